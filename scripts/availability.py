@@ -0,0 +1,116 @@
+# \scripts\availability.py
+"""
+Occupancy bitmasks for professor availability.
+
+Timings are converted once to minute integers, and each professor-day becomes a
+fixed-width int bitmask with bit i set when slot i (TIME_SLOTS[i] .. TIME_SLOTS[i+1])
+overlaps a class. The bits an interval covers are found by bisecting the slot
+boundaries, so building a mask costs O(intervals * log slots) and reading the
+availability back is a handful of bit operations.
+
+The overlap rule is the one generate_schedule has always used: a class occupies a
+slot when it starts before the slot ends and ends after the slot starts.
+
+compute_availability_matrix is the NumPy variant: it evaluates every
+professor x day x slot cell in one vectorised batch. NumPy is optional.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Optional, List, Dict, Tuple, Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the vectorised engine
+    np = None
+
+Interval = Tuple[int, int]
+
+
+def parse_minutes(value: Optional[str]) -> Optional[int]:
+    """'08:30' / '8:30' / '08:30:00' -> 510. Returns None for unparseable values."""
+    if not value:
+        return None
+    parts = value.strip().split(":")
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def format_minutes(minutes: int) -> str:
+    """510 -> '08:30'."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class SlotGrid:
+    """The slot boundaries of TIME_SLOTS in minutes, plus the mask helpers that use them."""
+
+    def __init__(self, time_slots: Sequence[str]):
+        boundaries = [parse_minutes(slot) for slot in time_slots]
+        if any(boundary is None for boundary in boundaries):
+            raise ValueError(f"Unparseable time slot in {list(time_slots)}")
+        self.boundaries: List[int] = boundaries  # type: ignore[assignment]
+        self.starts = self.boundaries[:-1]
+        self.ends = self.boundaries[1:]
+        self.slot_count = len(self.starts)
+        self.full_mask = (1 << self.slot_count) - 1
+
+    def interval_mask(self, start: int, end: int) -> int:
+        """Bits of the slots overlapping [start, end): slot_start < end and slot_end > start."""
+        first = bisect_right(self.ends, start)  # Slots ending at or before start are free
+        last = bisect_left(self.starts, end) - 1  # Slots starting at or after end are free
+        if first > last:
+            return 0
+        return ((1 << (last - first + 1)) - 1) << first
+
+    def occupancy_mask(self, intervals: Iterable[Interval]) -> int:
+        """OR of the interval masks: bit i set = slot i is busy."""
+        mask = 0
+        for start, end in intervals:
+            mask |= self.interval_mask(start, end)
+        return mask
+
+    def availability(self, mask: int) -> List[int]:
+        """1 for each free slot, 0 for each busy one, in slot order."""
+        free = ~mask & self.full_mask
+        return [(free >> index) & 1 for index in range(self.slot_count)]
+
+
+def to_minute_intervals(timings: Iterable[Tuple[str, str]]) -> List[Interval]:
+    """Converts (start, end) time strings once; entries with unparseable times are dropped."""
+    intervals: List[Interval] = []
+    for start_time, end_time in timings:
+        start, end = parse_minutes(start_time), parse_minutes(end_time)
+        if start is not None and end is not None:
+            intervals.append((start, end))
+    return intervals
+
+
+def compute_availability_matrix(grid: SlotGrid,
+                                intervals_by_cell: Dict[Tuple[int, int], List[Interval]],
+                                professor_count: int, day_count: int):
+    """
+    NumPy variant: returns a (professors, days, slots) uint8 array of 1 = free, 0 = busy.
+    intervals_by_cell maps (professor index, day index) to that cell's minute intervals.
+    """
+    if np is None:
+        raise RuntimeError("The numpy engine needs NumPy installed (pip install numpy).")
+
+    cells, starts, ends = [], [], []
+    for (professor_index, day_index), intervals in intervals_by_cell.items():
+        cell = professor_index * day_count + day_index
+        for start, end in intervals:
+            cells.append(cell)
+            starts.append(start)
+            ends.append(end)
+
+    busy_counts = np.zeros((professor_count * day_count, grid.slot_count), dtype=np.int32)
+    if cells:
+        slot_starts = np.asarray(grid.starts)
+        slot_ends = np.asarray(grid.ends)
+        interval_starts = np.asarray(starts)[:, None]
+        interval_ends = np.asarray(ends)[:, None]
+        # (intervals x slots) overlap table, summed into each interval's cell
+        overlaps = (slot_starts[None, :] < interval_ends) & (slot_ends[None, :] > interval_starts)
+        np.add.at(busy_counts, np.asarray(cells), overlaps.astype(np.int32))
+
+    return (busy_counts == 0).astype(np.uint8).reshape(professor_count, day_count, grid.slot_count)
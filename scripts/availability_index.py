@@ -0,0 +1,208 @@
+# \scripts\availability_index.py
+"""
+Precomputed lookup artifacts for professor availability, served as static files.
+
+scheduleData.index.json is an inverted index: for each day and slot, a bitset over a
+shared professor table telling who is free for that whole slot.
+  {
+    "version": 1,
+    "days": ["Monday", ...],
+    "slots": ["08:30", "09:00", ...],       # slot i runs from slots[i] to slots[i+1]
+    "professors": ["Aaron Anderson", ...],
+    "free": {"Monday": ["<base64 bitset>", ...one per slot...], ...}
+  }
+Bitsets use the same base64 little-endian packing as the compact schedule (bit j set
+= professors[j] is free). "Who's free now" is then: find the slot containing the
+current time, decode one bitset.
+
+Timetable times sit on the slot grid, so "free for the slot" is the same as "free at
+any instant of it". An off-grid class would make its whole slot count as busy.
+
+scheduleData.transitions.json is a next-transition table at minute resolution:
+  {
+    "version": 1,
+    "days": ["Monday", ...],
+    "professors": ["Aaron Anderson", ...],
+    "transitions": {"Monday": [[540, 630, 750, 840], ...one list per professor...], ...}
+  }
+Each list holds the professor's merged busy intervals flattened into the sorted
+minutes at which they become busy (even positions) and free again (odd positions).
+Everyone starts the day free, so bisect_right(list, t) is odd exactly when they are
+busy at t (start <= t < end, as in the available-now/soon API routes), and the entry
+at that position is their next transition. TransitionTable wraps the lookups.
+"""
+
+import json
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Iterable
+
+# Local imports
+from availability import parse_minutes, to_minute_intervals
+from schedule_encoding import pack_availability, unpack_availability
+from timetable_changes import write_if_changed
+
+INDEX_VERSION = 1
+TRANSITIONS_VERSION = 1
+MINUTES_PER_DAY = 24 * 60
+
+
+def professor_table(schedule: List[Dict[str, Any]]) -> List[str]:
+    """Professor names in first-seen order across the schedule's days."""
+    names: Dict[str, None] = {}
+    for day_data in schedule:
+        for entry in day_data["professors"]:
+            names.setdefault(entry["professor"], None)
+    return list(names)
+
+
+def build_free_index(schedule: List[Dict[str, Any]], time_slots: Sequence[str]) -> Dict[str, Any]:
+    """Transposes the schedule into one free-professor bitset per day and slot."""
+    professors = professor_table(schedule)
+    position = {name: index for index, name in enumerate(professors)}
+    slot_count = len(time_slots) - 1
+
+    free: Dict[str, List[str]] = {}
+    for day_data in schedule:
+        # Professors missing from a day have no classes that day, so start all free
+        slot_bits = [[1] * len(professors) for _ in range(slot_count)]
+        for entry in day_data["professors"]:
+            column = position[entry["professor"]]
+            for slot_index, is_free in enumerate(entry["availability"]):
+                slot_bits[slot_index][column] = is_free
+        free[day_data["day"]] = [pack_availability(bits) for bits in slot_bits]
+
+    return {
+        "version": INDEX_VERSION,
+        "days": [day_data["day"] for day_data in schedule],
+        "slots": list(time_slots),
+        "professors": professors,
+        "free": free,
+    }
+
+
+def write_artifact(document: Dict[str, Any], artifact_path: Path) -> bool:
+    """Writes an artifact as compact JSON (only if its bytes changed). Returns True if written."""
+    content = json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+    return write_if_changed(artifact_path, content)
+
+
+def write_free_index(index: Dict[str, Any], index_path: Path) -> bool:
+    """Writes the free-professor index. Returns True if the file changed."""
+    return write_artifact(index, index_path)
+
+
+def load_free_index(index_path: Path) -> Dict[str, Any]:
+    """Reads an index written by write_free_index."""
+    with index_path.open("r", encoding="utf-8") as index_file:
+        index = json.load(index_file)
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported free index version: {index.get('version')}")
+    return index
+
+
+def slot_for_time(slots: Sequence[str], time_value: str) -> Optional[int]:
+    """Index of the slot containing time_value ('HH:MM'), or None outside the grid."""
+    minutes = parse_minutes(time_value)
+    if minutes is None:
+        return None
+    boundaries = [parse_minutes(slot) for slot in slots]
+    slot_index = bisect_right(boundaries, minutes) - 1
+    if 0 <= slot_index < len(slots) - 1:
+        return slot_index
+    return None
+
+
+def free_professors_at(index: Dict[str, Any], day: str, time_value: str) -> Optional[List[str]]:
+    """
+    Professors free at `time_value` on `day` (sorted), or None when the day/time is
+    outside the indexed grid.
+    """
+    day_bitsets = index["free"].get(day)
+    slot_index = slot_for_time(index["slots"], time_value)
+    if day_bitsets is None or slot_index is None:
+        return None
+    professors = index["professors"]
+    bits = unpack_availability(day_bitsets[slot_index], len(professors))
+    return sorted(name for name, is_free in zip(professors, bits) if is_free)
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted, non-overlapping busy intervals; touching intervals are joined. Empty ones are dropped."""
+    merged: List[List[int]] = []
+    for start, end in sorted(interval for interval in intervals if interval[0] < interval[1]):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def build_transitions(professors: Sequence[str], timings_by_day: Dict[str, Dict[str, List[Tuple[str, str]]]],
+                      days: Sequence[str]) -> Dict[str, Any]:
+    """Flattens each professor-day's merged busy intervals into its transition list."""
+    transitions: Dict[str, List[List[int]]] = {}
+    for day in days:
+        timings_for_day = timings_by_day.get(day, {})
+        transitions[day] = [
+            [minute for interval in merge_intervals(to_minute_intervals(timings_for_day.get(name, [])))
+             for minute in interval]
+            for name in professors
+        ]
+    return {
+        "version": TRANSITIONS_VERSION,
+        "days": list(days),
+        "professors": list(professors),
+        "transitions": transitions,
+    }
+
+
+class TransitionTable:
+    """Microsecond "free now / free until / free soon" lookups over a transitions document."""
+
+    def __init__(self, document: Dict[str, Any]):
+        if document.get("version") != TRANSITIONS_VERSION:
+            raise ValueError(f"Unsupported transitions version: {document.get('version')}")
+        self.transitions: Dict[str, List[List[int]]] = document["transitions"]
+        self.position = {name: index for index, name in enumerate(document["professors"])}
+
+    @classmethod
+    def load(cls, path: Path) -> "TransitionTable":
+        """Reads a transitions file written by write_artifact."""
+        with path.open("r", encoding="utf-8") as transitions_file:
+            return cls(json.load(transitions_file))
+
+    def status(self, professor: str, day: str, time_value: str) -> Tuple[bool, Optional[int]]:
+        """
+        (free?, minute of the next transition or None if the state lasts all day) at
+        time_value on day. Unknown professors/days raise KeyError; bad times ValueError.
+        """
+        minutes = parse_minutes(time_value)
+        if minutes is None:
+            raise ValueError(f"Invalid time: {time_value!r}")
+        changes = self.transitions[day][self.position[professor]]
+        position = bisect_right(changes, minutes)
+        next_change = changes[position] if position < len(changes) else None
+        return position % 2 == 0, next_change
+
+    def is_free_at(self, professor: str, day: str, time_value: str) -> bool:
+        """True if the professor has no class at time_value on day."""
+        return self.status(professor, day, time_value)[0]
+
+    def free_until(self, professor: str, day: str, time_value: str) -> Optional[int]:
+        """
+        Minute at which the professor's current free block ends (MINUTES_PER_DAY if it
+        lasts the rest of the day), or None if they are busy now.
+        """
+        free, next_change = self.status(professor, day, time_value)
+        if not free:
+            return None
+        return MINUTES_PER_DAY if next_change is None else next_change
+
+    def free_within(self, professor: str, day: str, time_value: str, minutes: int) -> bool:
+        """True if the professor is free now or becomes free within the next `minutes`."""
+        free, next_change = self.status(professor, day, time_value)
+        if free:
+            return True
+        return next_change is not None and next_change - parse_minutes(time_value) <= minutes
+
@@ -0,0 +1,126 @@
+# \scripts\benchmark_extract.py
+"""
+Benchmarks timetableData extraction: DOM-free fast path vs BeautifulSoup fallback.
+Reports parse time (best/median over repeats) and peak traced memory per strategy.
+
+Usage:
+  python benchmark_extract.py saved_page.html [--repeat 20]
+  python benchmark_extract.py saved_page.html.gz
+  python benchmark_extract.py --synthetic 3000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Local imports
+from timetable_extract import extract_timetable_json_fast, extract_timetable_json_soup
+
+STRATEGIES: Dict[str, Callable[[str], Optional[List[Dict]]]] = {
+    "fast": extract_timetable_json_fast,
+    "soup": extract_timetable_json_soup,
+}
+
+
+def load_page(page_path: Path) -> str:
+    """Reads a saved page, transparently decompressing .gz files."""
+    if page_path.suffix == ".gz":
+        with gzip.open(page_path, "rt", encoding="utf-8") as page_file:
+            return page_file.read()
+    return page_path.read_text(encoding="utf-8")
+
+
+def build_synthetic_page(entry_count: int, seed: int = 0) -> str:
+    """
+    Builds a page shaped like the timetable viewer: a large markup body followed by a
+    script assigning timetableData. Strings include brackets/quotes to exercise the scanner.
+    """
+    rng = random.Random(seed)
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+    entries = []
+    for i in range(entry_count):
+        hour = rng.randint(8, 20)
+        entries.append({
+            "subject_code": f"CSIT {100 + i % 300}",
+            "type_with_section": f"Lecture [{i % 7}] \"A\"",
+            "week_day": rng.choice(days),
+            "start_time": f"{hour:02d}:30",
+            "end_time": f"{hour + 2:02d}:30",
+            "location": f"{rng.randint(1, 6)}.{rng.randint(10, 60)}-Classroom B",
+            "lecturer": f"Lecturer {i % 250}; Tutor {i % 90}",
+        })
+    rows = "".join(
+        f"<tr><td>{e['subject_code']}</td><td>{e['week_day']}</td>"
+        f"<td>{e['start_time']}</td><td>{e['location']}</td></tr>\n"
+        for e in entries
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Timetable</title></head><body>\n"
+        f"<table class=\"table\">{rows}</table>\n"
+        "<script>var unrelated = [1, 2, 3];</script>\n"
+        f"<script>\n  var timetableData = {json.dumps(entries)};\n  render(timetableData);\n"
+        "</script></body></html>"
+    )
+
+
+def measure(func: Callable[[str], Optional[List[Dict]]], html: str, repeat: int) -> Tuple[float, float, int]:
+    """Returns (best seconds, median seconds, peak traced bytes) for one strategy."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate run so tracing overhead doesn't skew timings
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), statistics.median(timings), peak
+
+
+def main():
+    """Parse args, load the page and print the comparison table."""
+    parser = argparse.ArgumentParser(description="Benchmark timetableData extraction strategies.")
+    parser.add_argument("page", nargs="?", type=Path, help="Saved timetable page (.html or .html.gz)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Benchmark a generated page with N entries instead")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per strategy (default: 10)")
+    args = parser.parse_args()
+
+    if args.page:
+        html = load_page(args.page)
+        source = str(args.page)
+    elif args.synthetic:
+        html = build_synthetic_page(args.synthetic)
+        source = f"synthetic page ({args.synthetic} entries)"
+    else:
+        parser.error("Provide a saved page path or --synthetic N.")
+
+    print(f"Benchmarking extraction on {source}: {len(html) / 1024:.1f} KiB, {args.repeat} runs each")
+
+    fast_result = extract_timetable_json_fast(html)
+    soup_result = extract_timetable_json_soup(html)
+    if fast_result is None or fast_result != soup_result:
+        print("Error: fast and soup extractors disagree on this page.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Both strategies extracted {len(fast_result)} entries.")
+
+    results = {name: measure(func, html, args.repeat) for name, func in STRATEGIES.items()}
+    print(f"\n{'strategy':<10}{'best ms':>12}{'median ms':>12}{'peak MiB':>12}")
+    for name, (best, median, peak) in results.items():
+        print(f"{name:<10}{best * 1000:>12.2f}{median * 1000:>12.2f}{peak / 2**20:>12.2f}")
+
+    fast_best, _, fast_peak = results["fast"]
+    soup_best, _, soup_peak = results["soup"]
+    print(f"\nfast path: {soup_best / fast_best:.1f}x faster, {soup_peak / max(fast_peak, 1):.1f}x less peak memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,85 @@
 # \scripts\db_connection.py
+"""
+Supabase client construction and lifecycle for the scripts.
+
+get_shared_client() returns one process-wide client whose PostgREST session is a
+pooled httpx client (keep-alive, HTTP/2 when the h2 package is available), so
+back-to-back queries, including the parallel keyset page reads, reuse open
+connections instead of repeating TLS handshakes. close_shared_client() (also run at
+interpreter exit) actually closes those connections; supabase_connection() wraps
+both as a context manager:
+
+    with supabase_connection() as client:
+        client.table("Teacher").select("id").execute()
+
+Timeouts and pool size come from the environment (all optional):
+  SUPABASE_TIMEOUT           read/write/pool timeout in seconds (default 30)
+  SUPABASE_CONNECT_TIMEOUT   connect timeout in seconds (default 10)
+  SUPABASE_MAX_CONNECTIONS   pooled connections per client (default 10)
+  SUPABASE_HTTP2             "0" to force HTTP/1.1
+"""
+
+import atexit
 import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
 from dotenv import load_dotenv
+from postgrest.utils import SyncClient as PostgrestSession
 # Import ClientOptions if you might use it for other settings like headers/schema later
 from supabase import create_client, Client, ClientOptions
 
+try:
+    import h2  # noqa: F401  # pylint: disable=unused-import
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx refuses http2=True without it
+    HTTP2_AVAILABLE = False
+
 # Load environment variables from .env file in the current directory
 load_dotenv()
 
-def get_supabase_client() -> Client:
+# --- Connection Pool Configuration ---
+DEFAULT_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "10"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY = 60.0  # Seconds an idle pooled connection is kept open
+USE_HTTP2 = HTTP2_AVAILABLE and os.getenv("SUPABASE_HTTP2", "1") != "0"
+
+_shared_client: Optional[Client] = None
+_shared_client_lock = threading.Lock()
+
+
+def _pooled_session(base_url: str, headers: httpx.Headers, timeout: httpx.Timeout,
+                    max_connections: int, http2: bool) -> PostgrestSession:
+    """PostgREST session with explicit pool limits and keep-alive."""
+    return PostgrestSession(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        follow_redirects=True,
+    )
+
+
+def get_supabase_client(timeout: Optional[float] = None, connect_timeout: Optional[float] = None,
+                        max_connections: Optional[int] = None, http2: Optional[bool] = None) -> Client:
     """
-    Initializes and returns a Supabase client instance using environment variables.
+    Initializes and returns a new Supabase client instance using environment variables.
 
     Uses the SERVICE ROLE KEY for administrative access, bypassing RLS.
     Ensure the key is kept secret and secure. For supabase==2.15.0, specific auth
     options like auto_refresh_token are not passed directly to ClientOptions.
+
+    The client's PostgREST session is pooled (see _pooled_session); arguments left as
+    None use the SUPABASE_* environment defaults. Close it with close_client().
+    Scripts should normally use get_shared_client() instead.
     """
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -23,13 +89,18 @@ def get_supabase_client() -> Client:
     if not key:
         raise ValueError("Supabase Service Role Key not set in environment variables (SUPABASE_SERVICE_ROLE_KEY).")
 
+    request_timeout = httpx.Timeout(
+        DEFAULT_TIMEOUT if timeout is None else timeout,
+        connect=DEFAULT_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+    )
+
     try:
         # --- Corrected Options for supabase==2.15.0 ---
         # Initialize ClientOptions without the auth-related arguments that caused the TypeError.
         # The library likely handles defaults appropriately when the service key is provided.
         # If you needed to set headers or schema, you would pass them here, e.g.:
         # options = ClientOptions(schema="public", headers={"X-Custom": "Value"})
-        options = ClientOptions() # Create default options object
+        options = ClientOptions(postgrest_client_timeout=request_timeout)
         # --- End Correction ---
 
         # Pass the ClientOptions instance using the 'options' keyword argument.
@@ -37,8 +108,70 @@ def get_supabase_client() -> Client:
         # ClientOptions() is not needed, but this is safer for future additions.
         supabase: Client = create_client(url, key, options=options)
 
+        # supabase-py does not expose pool settings, so swap the PostgREST session
+        # it builds for a pooled one carrying the same base URL and auth headers.
+        postgrest = supabase.postgrest
+        default_session = postgrest.session
+        postgrest.session = _pooled_session(
+            postgrest.base_url,
+            default_session.headers,
+            request_timeout,
+            DEFAULT_MAX_CONNECTIONS if max_connections is None else max_connections,
+            USE_HTTP2 if http2 is None else http2 and HTTP2_AVAILABLE,
+        )
+        default_session.close()
+
         print("Supabase client initialized successfully (using Service Role Key - RLS bypassed).")
         return supabase
     except Exception as e:
         print(f"Error initializing Supabase client: {e}")
-        raise # Re-raise the exception after printing
\ No newline at end of file
+        raise # Re-raise the exception after printing
+
+
+def close_client(client: Client) -> None:
+    """Closes the HTTP connections held by a client (PostgREST, auth, storage, functions)."""
+    # Only sessions the client actually created; the properties would build new ones
+    postgrest = getattr(client, "_postgrest", None)
+    if postgrest is not None:
+        postgrest.session.close()
+    auth_http = getattr(client.auth, "_http_client", None)
+    if auth_http is not None:
+        auth_http.close()
+    storage = getattr(client, "_storage", None)
+    if storage is not None:
+        storage.session.close()
+    functions = getattr(client, "_functions", None)
+    if functions is not None:
+        functions._client.close()  # pylint: disable=protected-access
+
+
+def get_shared_client() -> Client:
+    """Returns the process-wide Supabase client, creating it on first use (thread-safe)."""
+    global _shared_client  # pylint: disable=global-statement
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = get_supabase_client()
+    return _shared_client
+
+
+def close_shared_client() -> None:
+    """Closes the process-wide client if one was created. Safe to call repeatedly."""
+    global _shared_client  # pylint: disable=global-statement
+    with _shared_client_lock:
+        client, _shared_client = _shared_client, None
+    if client is not None:
+        close_client(client)
+        print("Supabase connections closed.")
+
+
+@contextmanager
+def supabase_connection() -> Iterator[Client]:
+    """Yields the process-wide client and closes its connections on exit."""
+    try:
+        yield get_shared_client()
+    finally:
+        close_shared_client()
+
+
+atexit.register(close_shared_client)
@@ -0,0 +1,156 @@
+# \scripts\fetch_policy.py
+"""
+Request pacing and retry backoff used by TimetableScraper.fetch_page.
+
+  * TokenBucket / HostRateLimiter: steady-state pacing per host (rate + burst),
+    shared safely between worker threads.
+  * BackoffPolicy: capped exponential backoff with full jitter, honouring
+    Retry-After when the server sends one.
+  * FetchPolicy: bundles the above; FetchPolicy.no_delay() disables every wait
+    (for local replays and tests).
+"""
+
+import email.utils
+import random
+import threading
+import time
+from typing import Optional, Dict, Callable
+from urllib.parse import urlsplit
+
+# --- Defaults ---
+DEFAULT_RATE = 0.5  # Requests per second per host
+DEFAULT_BURST = 2  # Requests allowed back-to-back before pacing kicks in
+DEFAULT_BACKOFF_BASE = 5.0  # Seconds, first retry waits up to this long
+DEFAULT_BACKOFF_CAP = 60.0  # Seconds, no single retry waits longer than this
+DEFAULT_CHALLENGE_BASE = 10.0  # Cloudflare challenges need a longer cool-down
+MAX_RETRY_AFTER = 300.0  # Ignore absurd Retry-After values beyond this
+
+
+def _no_sleep(_seconds: float) -> None:
+    """Sleep replacement used by FetchPolicy.no_delay()."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header (delta-seconds or HTTP-date) into seconds from now.
+    Returns None if the header is missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() reserves a token immediately (the bucket may
+    go negative) and sleeps outside the lock, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.sleep = sleep
+
+    def acquire(self) -> float:
+        """Take one token, waiting if necessary. Returns the seconds waited."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_time > 0:
+            self.sleep(wait_time)
+        return wait_time
+
+
+class HostRateLimiter:
+    """One TokenBucket per host. A rate of None (or <= 0) disables pacing entirely."""
+
+    def __init__(self, rate: Optional[float] = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = burst
+        self.sleep = sleep
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url: str) -> float:
+        """Block until a request to url's host may start. Returns the seconds waited."""
+        if self.rate is None:
+            return 0.0
+        host = urlsplit(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst, self.sleep)
+        return bucket.acquire()
+
+
+class BackoffPolicy:
+    """
+    Capped exponential backoff with full jitter: the wait before retry n (0-based) is
+    uniform(0, min(cap, base * 2**n)). A Retry-After from the server takes precedence.
+    """
+
+    def __init__(self, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP,
+                 max_retry_after: float = MAX_RETRY_AFTER):
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retrying after failed attempt number `attempt`."""
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        ceiling = min(self.cap, self.base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class FetchPolicy:
+    """Pacing + backoff configuration for one scraper. Swap it out to change behaviour."""
+
+    def __init__(self, limiter: Optional[HostRateLimiter] = None,
+                 backoff: Optional[BackoffPolicy] = None,
+                 challenge_backoff: Optional[BackoffPolicy] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.limiter = limiter or HostRateLimiter(sleep=sleep)
+        self.backoff = backoff or BackoffPolicy()
+        self.challenge_backoff = challenge_backoff or BackoffPolicy(base=DEFAULT_CHALLENGE_BASE)
+        self.sleep = sleep
+
+    @classmethod
+    def no_delay(cls) -> "FetchPolicy":
+        """A policy that never waits: no pacing, no backoff sleeps."""
+        return cls(
+            limiter=HostRateLimiter(rate=None, sleep=_no_sleep),
+            backoff=BackoffPolicy(base=0, cap=0, max_retry_after=0),
+            challenge_backoff=BackoffPolicy(base=0, cap=0, max_retry_after=0),
+            sleep=_no_sleep,
+        )
+
+    def before_request(self, url: str) -> None:
+        """Pace the next request to url's host."""
+        self.limiter.wait(url)
+
+    def wait_before_retry(self, attempt: int, retry_after: Optional[float] = None,
+                          challenge: bool = False) -> float:
+        """Sleep before the next attempt and return how long that was."""
+        policy = self.challenge_backoff if challenge else self.backoff
+        wait_time = policy.delay(attempt, retry_after)
+        if wait_time > 0:
+            print(f"  Waiting {wait_time:.2f} seconds before retrying...")
+            self.sleep(wait_time)
+        return wait_time
@@ -0,0 +1,173 @@
+# \scripts\free_windows.py
+"""
+Finds the time windows when a group of professors are all free (committee meetings,
+thesis defences, ...), at minute resolution.
+
+Each professor-day is a busy bitmask with one bit per minute of the searched window;
+the group's common free time is the complement of the OR of its members' masks, and
+the windows are the runs of set bits, so the cost per day is one big-int OR per
+professor regardless of how many classes they teach.
+
+Usage:
+  python free_windows.py "Aaron Anderson" "Jane Doe" --days Monday-Friday --min-duration 60
+  python free_windows.py "Aaron Anderson" "Jane Doe" --source supabase --json
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+from typing import List, Dict, Tuple, Iterable, Sequence
+
+# Local imports
+from availability import format_minutes, parse_minutes, to_minute_intervals
+from generate_schedule import (
+    DAYS_OF_WEEK,
+    DEFAULT_CSV_PATH,
+    TIME_SLOTS,
+    ProfessorTimingsDict,
+    load_professor_timings,
+    load_professor_timings_from_csv,
+)
+
+# --- Defaults ---
+DEFAULT_WINDOW_START = TIME_SLOTS[0]
+DEFAULT_WINDOW_END = TIME_SLOTS[-1]
+DEFAULT_MIN_DURATION = 30  # Minutes
+
+Window = Tuple[int, int]  # (start minute, end minute), end exclusive
+
+
+def mask_to_windows(mask: int, origin: int, min_duration: int) -> List[Window]:
+    """Runs of set bits in mask as (start, end) minutes, keeping runs >= min_duration."""
+    windows: List[Window] = []
+    while mask:
+        start = (mask & -mask).bit_length() - 1  # Lowest set bit
+        shifted = mask >> start
+        length = (shifted ^ (shifted + 1)).bit_length() - 1  # Trailing ones
+        if length >= min_duration:
+            windows.append((origin + start, origin + start + length))
+        mask &= ~(((1 << length) - 1) << start)
+    return windows
+
+
+def parse_days(spec: str) -> List[str]:
+    """'Monday-Friday', 'mon,wed,fri' or 'all' -> day names in week order."""
+    def resolve(name: str) -> str:
+        matches = [day for day in DAYS_OF_WEEK if day.lower().startswith(name.strip().lower())]
+        if len(matches) != 1 or not name.strip():
+            raise ValueError(f"Unknown or ambiguous day: {name!r}")
+        return matches[0]
+
+    if spec.strip().lower() == "all":
+        return list(DAYS_OF_WEEK)
+    days: List[str] = []
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = (DAYS_OF_WEEK.index(resolve(name)) for name in part.split("-", 1))
+            if first > last:
+                raise ValueError(f"Day range runs backwards: {part!r}")
+            days.extend(DAYS_OF_WEEK[first:last + 1])
+        else:
+            days.append(resolve(part))
+    return [day for day in DAYS_OF_WEEK if day in days]
+
+
+class FreeWindowFinder:
+    """Common-free-window queries over one load of professor timings."""
+
+    def __init__(self, timings: ProfessorTimingsDict, professors: Iterable[str],
+                 window_start: str = DEFAULT_WINDOW_START, window_end: str = DEFAULT_WINDOW_END):
+        start, end = parse_minutes(window_start), parse_minutes(window_end)
+        if start is None or end is None or start >= end:
+            raise ValueError(f"Invalid search window {window_start}-{window_end}")
+        self.timings = timings
+        self.professors = set(professors)
+        self.origin = start
+        self.width = end - start
+        self.full_mask = (1 << self.width) - 1
+        self.busy_masks: Dict[Tuple[str, str], int] = {}
+
+    def busy_mask(self, professor: str, day: str) -> int:
+        """Minute bitmask of the professor's classes on day, clipped to the search window."""
+        key = (professor, day)
+        if key not in self.busy_masks:
+            mask = 0
+            for start, end in to_minute_intervals(self.timings.get(day, {}).get(professor, [])):
+                start, end = max(start, self.origin), min(end, self.origin + self.width)
+                if start < end:
+                    mask |= ((1 << (end - start)) - 1) << (start - self.origin)
+            self.busy_masks[key] = mask
+        return self.busy_masks[key]
+
+    def common_free_windows(self, professors: Sequence[str], days: Sequence[str],
+                            min_duration: int = DEFAULT_MIN_DURATION) -> Dict[str, List[Window]]:
+        """
+        Windows (start, end minutes) on each day when every listed professor is free for
+        at least min_duration minutes. Raises ValueError for unknown professor names.
+        """
+        unknown = [name for name in professors if name not in self.professors]
+        if unknown:
+            raise ValueError(f"Unknown professor(s): {', '.join(unknown)}")
+
+        result: Dict[str, List[Window]] = {}
+        for day in days:
+            busy = 0
+            for professor in professors:
+                busy |= self.busy_mask(professor, day)
+                if busy == self.full_mask:
+                    break  # No free minute left, the rest cannot change that
+            result[day] = mask_to_windows(~busy & self.full_mask, self.origin, max(1, min_duration))
+        return result
+
+
+# --- Main Execution ---
+def main():
+    """Parse args, load timings and print the common free windows."""
+    parser = argparse.ArgumentParser(description="Find the times when all given professors are free.")
+    parser.add_argument("professors", nargs="+", help="Professor names, as they appear in the timetable")
+    parser.add_argument("--days", default="Monday-Friday", help="Days to search, e.g. 'Monday-Friday', 'mon,wed' or 'all' (default: Monday-Friday)")
+    parser.add_argument("--min-duration", type=int, default=DEFAULT_MIN_DURATION, help=f"Minimum window length in minutes (default: {DEFAULT_MIN_DURATION})")
+    parser.add_argument("--from", dest="window_start", default=DEFAULT_WINDOW_START, help=f"Earliest time to consider (default: {DEFAULT_WINDOW_START})")
+    parser.add_argument("--until", dest="window_end", default=DEFAULT_WINDOW_END, help=f"Latest time to consider (default: {DEFAULT_WINDOW_END})")
+    parser.add_argument("--source", default="csv", metavar="{csv,supabase,PATH}", help="Where timings come from (default: csv, i.e. public/classes.csv)")
+    parser.add_argument("--json", action="store_true", help="Print the windows as JSON")
+    args = parser.parse_args()
+
+    try:
+        days = parse_days(args.days)
+        # Loader progress goes to stderr so --json output stays parseable
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.source == "supabase":
+                professors, timings = load_professor_timings()
+            else:
+                source_path = DEFAULT_CSV_PATH if args.source == "csv" else Path(args.source)
+                professors, timings = load_professor_timings_from_csv(source_path)
+        finder = FreeWindowFinder(timings, professors, args.window_start, args.window_end)
+        windows = finder.common_free_windows(args.professors, days, args.min_duration)
+    except (ValueError, RuntimeError) as query_err:
+        print(f"Error: {query_err}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({
+            day: [{"start": format_minutes(start), "end": format_minutes(end), "minutes": end - start}
+                  for start, end in day_windows]
+            for day, day_windows in windows.items()
+        }, indent=2))
+        return
+
+    print(f"\nCommon free windows for {len(args.professors)} professor(s), "
+          f"at least {args.min_duration} min, {args.window_start}-{args.window_end}:")
+    for day, day_windows in windows.items():
+        if not day_windows:
+            print(f"  {day}: none")
+            continue
+        spans = ", ".join(f"{format_minutes(start)}-{format_minutes(end)} ({end - start} min)"
+                          for start, end in day_windows)
+        print(f"  {day}: {spans}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,28 @@
 # Modified for Professor Availability
 # pylint: disable=invalid-name, broad-except, logging-fstring-interpolation
 
+import argparse
+import csv
+import hashlib
 import json
 import sys
 import traceback
 from pathlib import Path
 from collections import defaultdict
-from typing import List, Dict, Any, Tuple, DefaultDict, Set
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple, DefaultDict, Set, NamedTuple, Sequence, Iterable
 
 # Third-party imports
 from postgrest.exceptions import APIError
 from httpx import RequestError
 
 # Local imports
-from db_connection import get_supabase_client
+from availability import SlotGrid, compute_availability_matrix, to_minute_intervals
+from availability_index import build_free_index, build_transitions, write_artifact, write_free_index
+from db_connection import close_shared_client, get_shared_client
+from schedule_encoding import write_compact_artifacts
+from timetable_changes import normalize_time
+from keyset_pagination import DEFAULT_WORKERS, iter_rows_by_id
 
 # --- Constants ---
 DAYS_OF_WEEK = [
@@ -26,141 +35,121 @@ TIME_SLOTS = [ # Keep time slots as defined
     "16:30", "17:00", "17:30", "18:00", "18:30", "19:00", "19:30", "20:00",
     "20:30", "21:00", "21:30", "22:00", "22:30",
 ]
+SLOT_GRID = SlotGrid(TIME_SLOTS)
 SCRIPT_DIR = Path(__file__).parent
 # Output file remains the same, but content structure will change
 OUTPUT_JSON_PATH = SCRIPT_DIR.parent / "public" / "scheduleData.json"
-
-# --- Supabase Client Initialization ---
-try:
-    supabase = get_supabase_client()
-except ValueError as config_err:
-    print(f"Configuration Error: {config_err}", file=sys.stderr)
-    sys.exit("Exiting due to missing Supabase configuration.")
-except Exception as init_err:
-    print(f"Unexpected error initializing Supabase client: {init_err}", file=sys.stderr)
-    sys.exit("Exiting due to Supabase client initialization failure.")
+DEFAULT_CSV_PATH = SCRIPT_DIR.parent / "public" / "classes.csv"
+# Room / subject availability, same structure as scheduleData.json
+ROOMS_JSON_PATH = SCRIPT_DIR.parent / "public" / "roomScheduleData.json"
+SUBJECTS_JSON_PATH = SCRIPT_DIR.parent / "public" / "subjectScheduleData.json"
+# Day x slot -> free-professor bitsets, for "who's free now" lookups without the DB
+INDEX_JSON_PATH = SCRIPT_DIR.parent / "public" / "scheduleData.index.json"
+# Per professor and day, the sorted minutes at which they become busy / free again
+TRANSITIONS_JSON_PATH = SCRIPT_DIR.parent / "public" / "scheduleData.transitions.json"
+# Per-professor timing hashes of the last run, used to skip unchanged professors
+DEFAULT_MANIFEST_PATH = SCRIPT_DIR / ".cache" / "schedule_manifest.json"
+MANIFEST_VERSION = 1
 
 # --- Type Alias for Clarity ---
-# TimingsDict now maps: Day -> Teacher Name -> List of (StartTime, EndTime) tuples
-ProfessorTimingsDict = DefaultDict[str, DefaultDict[str, List[Tuple[str, str]]]]
+# TimingsDict maps: Day -> group key (Teacher / Room / SubCode) -> List of (StartTime, EndTime) tuples
+TimingsDict = DefaultDict[str, DefaultDict[str, List[Tuple[str, str]]]]
+ProfessorTimingsDict = TimingsDict
+# Grouping name -> (sorted keys, timings grouped by day and key)
+GroupedTimings = Dict[str, Tuple[List[str], TimingsDict]]
+# Availability per day (DAYS_OF_WEEK order), per professor (input order): 1 = free, 0 = busy
+AvailabilityGrid = List[List[List[int]]]
+# Professor -> Day -> availability, for entries carried over from the previous output
+ReusedAvailability = Dict[str, Dict[str, List[int]]]
+
+
+
+class Grouping(NamedTuple):
+    """One entity type availability can be generated for."""
+    column: str  # Timings column holding the key
+    list_key: str  # JSON key of a day's entry list
+    entry_key: str  # JSON key of an entry's name
+    output_path: Path
+
+
+GROUPINGS: Dict[str, Grouping] = {
+    "professor": Grouping("Teacher", "professors", "professor", OUTPUT_JSON_PATH),
+    "room": Grouping("Room", "rooms", "room", ROOMS_JSON_PATH),
+    "subject": Grouping("SubCode", "subjects", "subject", SUBJECTS_JSON_PATH),
+}
 
 # --- Functions ---
 
-def fetch_scheduled_teachers() -> List[str]:
-    """
-    Fetches unique teacher names from the 'Timings' table.
-    Returns a sorted list of teacher names.
-    """
-    print("Fetching scheduled teachers from Timings data...")
-    teacher_names: Set[str] = set()
-    try:
-        # Fetch all records using pagination to handle large datasets
-        all_data = []
-        offset = 0
-        page_size = 1000
-
-        while True:
-            response = (
-                supabase.table("Timings")
-                .select("Teacher")
-                .neq("Teacher", None) # Ensure Teacher is not null
-                .order("Teacher") # Add explicit ordering for consistency
-                .range(offset, offset + page_size - 1) # Use range for pagination
-                .execute()
-            )
-
-            if not response.data or len(response.data) == 0:
-                break
-
-            all_data.extend(response.data)
-            print(f"Fetched page: {len(response.data)} records (total so far: {len(all_data)})")
-
-            # If we got less than page_size records, we've reached the end
-            if len(response.data) < page_size:
-                break
-
-            offset += page_size
-
-        print(f"Total records fetched: {len(all_data)}")
-
-        if all_data:
-            count = 0
-            for timing in all_data:
-                teacher = timing.get("Teacher")
-                if teacher and teacher.strip():
-                    teacher_names.add(teacher.strip())
-                    count += 1
-            print(f"Found {len(teacher_names)} unique scheduled teachers from {count} relevant timing entries.")
-            # Return sorted list
-            return sorted(list(teacher_names))
-        else:
-            print("No timings found in the database.")
-            return []
-    except (APIError, RequestError) as db_err:
-        print(f"Error fetching teachers from Timings: {type(db_err).__name__} - {db_err}", file=sys.stderr)
-    except Exception as e:
-        print(f"Unexpected error fetching teachers from Timings: {e}", file=sys.stderr)
-        traceback.print_exc()
+class _GroupAccumulator:
+    """Key set and day grouping for one grouping, filled row by row."""
 
-    raise RuntimeError("Failed to fetch scheduled teachers data.")
+    def __init__(self, column: str):
+        self.column = column
+        self.keys: Set[str] = set()
+        self.timings_by_day: TimingsDict = defaultdict(lambda: defaultdict(list))
 
 
-def fetch_all_professor_timings() -> ProfessorTimingsDict:
+def fold_timing(timing: Dict[str, Any], accumulators: Sequence[_GroupAccumulator]) -> bool:
+    """
+    Adds one Timings/CSV row to every grouping's key set and day grouping.
+    Returns True if it contributed a valid (day, start, end) entry.
     """
-    Fetches all timings and organizes them by Day and Teacher Name.
-    Returns defaultdict: timings_by_day[day][teacher_name] = list of (start, end)
+    day = timing.get("Day")
+    start_time = timing.get("StartTime")
+    end_time = timing.get("EndTime")
+    valid = bool(day and start_time and end_time)
+    contributed = False
+    for accumulator in accumulators:
+        key = (timing.get(accumulator.column) or "").strip()
+        if not key:
+            continue
+        accumulator.keys.add(key)
+        if valid:
+            accumulator.timings_by_day[day][key].append((start_time, end_time))
+            contributed = True
+    return contributed
+
+
+def _new_accumulators(groupings: Sequence[str]) -> List[_GroupAccumulator]:
+    return [_GroupAccumulator(GROUPINGS[name].column) for name in groupings]
+
+
+def _grouped_result(groupings: Sequence[str], accumulators: List[_GroupAccumulator]) -> GroupedTimings:
+    for name, accumulator in zip(groupings, accumulators):
+        print(f"Found {len(accumulator.keys)} unique {GROUPINGS[name].list_key}.")
+    return {
+        name: (sorted(accumulator.keys), accumulator.timings_by_day)
+        for name, accumulator in zip(groupings, accumulators)
+    }
+
+
+def load_timings(groupings: Sequence[str] = ("professor",)) -> GroupedTimings:
     """
-    print("Fetching all timings from Supabase and grouping by Professor...")
-    timings_by_day: ProfessorTimingsDict = defaultdict(lambda: defaultdict(list))
+    Loads the Timings table in a single pass (parallel keyset pagination), building the
+    sorted key list and the timings grouped by Day and key for every requested grouping.
+    """
+    print(f"Fetching all timings from Supabase and grouping by {', '.join(groupings)}...")
+    accumulators = _new_accumulators(groupings)
+    columns = ", ".join(["id", "Day", "StartTime", "EndTime", *(acc.column for acc in accumulators)])
     try:
-        # Fetch all records using pagination to handle large datasets
-        all_data = []
-        offset = 0
-        page_size = 1000
-
-        while True:
-            response = (
-                supabase.table("Timings")
-                .select("Day, Teacher, StartTime, EndTime")
-                .neq("Teacher", None) # Ensure Teacher is not null
-                .order("Day, Teacher, StartTime") # Add explicit ordering for consistency
-                .range(offset, offset + page_size - 1) # Use range for pagination
-                .execute()
-            )
-
-            if not response.data or len(response.data) == 0:
-                break
-
-            all_data.extend(response.data)
-            print(f"Fetched timings page: {len(response.data)} records (total so far: {len(all_data)})")
-
-            # If we got less than page_size records, we've reached the end
-            if len(response.data) < page_size:
-                break
-
-            offset += page_size
-
-        print(f"Total timing records fetched: {len(all_data)}")
-
-        if all_data:
-            processed_count = 0
-            for timing in all_data:
-                day = timing.get("Day")
-                teacher_name = timing.get("Teacher")
-                start_time = timing.get("StartTime")
-                end_time = timing.get("EndTime")
-
-                # Validate data - include all teachers
-                if day and teacher_name and start_time and end_time and teacher_name.strip():
-                    # Group by Day, then by Teacher Name
-                    timings_by_day[day][teacher_name.strip()].append((start_time, end_time))
+        total_records = 0
+        processed_count = 0
+
+        # Keyset pages on id, with the id space split across a bounded thread pool
+        for range_rows in iter_rows_by_id(get_shared_client(), "Timings", columns, workers=DEFAULT_WORKERS):
+            # Fold each id range into every grouping as it completes
+            for timing in range_rows:
+                if fold_timing(timing, accumulators):
                     processed_count += 1
 
-            print(f"Fetched and processed {processed_count} valid timing entries for professors.")
-            return timings_by_day
-        else:
+            total_records += len(range_rows)
+            print(f"Fetched timings range: {len(range_rows)} records (total so far: {total_records})")
+
+        print(f"Total timing records fetched: {total_records}")
+        if not total_records:
             print("No timings found in the database.")
-            return timings_by_day
+        print(f"Processed {processed_count} valid timing entries.")
+        return _grouped_result(groupings, accumulators)
     except (APIError, RequestError) as db_err:
         print(f"Error fetching timings: {type(db_err).__name__} - {db_err}", file=sys.stderr)
     except Exception as e:
@@ -170,6 +159,73 @@ def fetch_all_professor_timings() -> ProfessorTimingsDict:
     raise RuntimeError("Failed to fetch timings data.")
 
 
+def load_professor_timings() -> Tuple[List[str], ProfessorTimingsDict]:
+    """
+    Professor-only load_timings. Returns (teacher names,
+    timings_by_day[day][teacher_name] = list of (start, end)).
+    """
+    return load_timings(("professor",))["professor"]
+
+
+def _fold_csv_rows(rows: Iterable[Dict[str, Any]], accumulators: Sequence[_GroupAccumulator]) -> Tuple[int, int]:
+    """Pads the CSV times like in Timings and folds each row. Returns (rows, valid entries)."""
+    total_records = 0
+    processed_count = 0
+    for row in rows:
+        total_records += 1
+        row["StartTime"] = normalize_time(row.get("StartTime") or "")
+        row["EndTime"] = normalize_time(row.get("EndTime") or "")
+        if fold_timing(row, accumulators):
+            processed_count += 1
+    return total_records, processed_count
+
+
+def load_timings_from_csv(csv_path: Path, groupings: Sequence[str] = ("professor",)) -> GroupedTimings:
+    """
+    Same result as load_timings, built from a scraped timetable CSV with a streaming
+    reader (no Supabase access). Times are zero-padded like in Timings.
+    """
+    print(f"Reading timings from CSV: {csv_path}...")
+    accumulators = _new_accumulators(groupings)
+    try:
+        with csv_path.open("r", newline="", encoding="utf-8") as csv_file:
+            reader = csv.DictReader(csv_file)
+            required = {"Day", "StartTime", "EndTime", *(acc.column for acc in accumulators)}
+            missing = required - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"CSV file is missing columns: {', '.join(sorted(missing))}")
+
+            total_records, processed_count = _fold_csv_rows(reader, accumulators)
+
+        print(f"Total CSV rows read: {total_records}")
+        print(f"Processed {processed_count} valid timing entries.")
+        return _grouped_result(groupings, accumulators)
+    except FileNotFoundError:
+        print(f"Error: CSV file not found at {csv_path}", file=sys.stderr)
+    except (ValueError, csv.Error) as csv_err:
+        print(f"Error processing CSV file: {csv_err}", file=sys.stderr)
+    except Exception as e:
+        print(f"Unexpected error reading timings CSV: {e}", file=sys.stderr)
+        traceback.print_exc()
+
+    raise RuntimeError("Failed to read timings CSV.")
+
+
+def load_timings_from_rows(rows: Iterable[Dict[str, Any]], groupings: Sequence[str] = ("professor",)) -> GroupedTimings:
+    """Same result as load_timings_from_csv, from timetable CSV rows already in memory (left unmodified)."""
+    print("Grouping in-memory timetable rows...")
+    accumulators = _new_accumulators(groupings)
+    total_records, processed_count = _fold_csv_rows((dict(row) for row in rows), accumulators)
+    print(f"Total rows: {total_records}")
+    print(f"Processed {processed_count} valid timing entries.")
+    return _grouped_result(groupings, accumulators)
+
+
+def load_professor_timings_from_csv(csv_path: Path) -> Tuple[List[str], ProfessorTimingsDict]:
+    """Professor-only load_timings_from_csv."""
+    return load_timings_from_csv(csv_path, ("professor",))["professor"]
+
+
 def is_professor_available(
     slot_start: str, slot_end: str, professor_timings: List[Tuple[str, str]]
 ) -> bool:
@@ -184,58 +240,195 @@ def is_professor_available(
     return True # Available (No overlap found)
 
 
-def generate_professor_schedule(
+def scan_availability(
     teachers_to_schedule: List[str], all_timings: ProfessorTimingsDict
-) -> List[Dict[str, Any]]:
+) -> AvailabilityGrid:
+    """Reference engine: checks every slot against every interval with is_professor_available."""
+    grid: AvailabilityGrid = []
+    for day in DAYS_OF_WEEK:
+        timings_for_day = all_timings.get(day, {})
+        day_rows = []
+        for teacher_name in teachers_to_schedule:
+            timings_for_this_prof = timings_for_day.get(teacher_name, [])
+            day_rows.append([
+                1 if is_professor_available(TIME_SLOTS[i], TIME_SLOTS[i + 1], timings_for_this_prof) else 0
+                for i in range(len(TIME_SLOTS) - 1) # Iterate through pairs of time slots
+            ])
+        grid.append(day_rows)
+    return grid
+
+
+@lru_cache(maxsize=None)
+def timing_slot_mask(start_time: str, end_time: str) -> int:
     """
-    Generates schedule availability data for given professors and their timings.
-    Outputs professor names in the JSON.
+    Slot bits covered by one (start, end) timing. Cached, so each distinct timing is
+    converted once and shared by every grouping (professors, rooms, subjects).
     """
-    print("Starting professor schedule data generation...")
-    schedule: List[Dict[str, Any]] = []
+    return SLOT_GRID.occupancy_mask(to_minute_intervals([(start_time, end_time)]))
 
-    for day in DAYS_OF_WEEK:
-        print(f"Processing day: {day}")
-        # *** UPDATED: Structure uses "professors" key ***
-        day_data: Dict[str, Any] = {"day": day, "professors": []}
-        timings_for_day = all_timings.get(day, defaultdict(list))
 
+def bitmask_availability(
+    teachers_to_schedule: List[str], all_timings: ProfessorTimingsDict
+) -> AvailabilityGrid:
+    """Builds one occupancy bitmask per professor-day from minute intervals, then reads the bits."""
+    grid: AvailabilityGrid = []
+    for day in DAYS_OF_WEEK:
+        timings_for_day = all_timings.get(day, {})
+        day_rows = []
         for teacher_name in teachers_to_schedule:
-            # *** UPDATED: Structure uses "professor" key ***
-            prof_output_data = {"professor": teacher_name, "availability": []}
-            timings_for_this_prof = timings_for_day.get(teacher_name, [])
-
-            slot_count = len(TIME_SLOTS)
-            for i in range(slot_count - 1): # Iterate through pairs of time slots
-                start_time = TIME_SLOTS[i]
-                end_time = TIME_SLOTS[i + 1]
+            mask = 0
+            for start_time, end_time in timings_for_day.get(teacher_name, []):
+                mask |= timing_slot_mask(start_time, end_time)
+            day_rows.append(SLOT_GRID.availability(mask))
+        grid.append(day_rows)
+    return grid
 
-                # Check availability for this professor during this slot
-                available = is_professor_available(
-                    start_time, end_time, timings_for_this_prof
-                )
-                # Append 1 for available, 0 for busy
-                prof_output_data["availability"].append(1 if available else 0)
 
-            # Append this professor's availability data for the day
-            day_data["professors"].append(prof_output_data)
+def numpy_availability(
+    teachers_to_schedule: List[str], all_timings: ProfessorTimingsDict
+) -> AvailabilityGrid:
+    """Computes the whole professors x days x slots matrix in one vectorised NumPy batch."""
+    teacher_index = {name: index for index, name in enumerate(teachers_to_schedule)}
+    intervals_by_cell: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for day_index, day in enumerate(DAYS_OF_WEEK):
+        for teacher_name, timings in all_timings.get(day, {}).items():
+            if teacher_name in teacher_index:
+                intervals_by_cell[(teacher_index[teacher_name], day_index)] = to_minute_intervals(timings)
+
+    matrix = compute_availability_matrix(
+        SLOT_GRID, intervals_by_cell, len(teachers_to_schedule), len(DAYS_OF_WEEK)
+    )
+    # (professors, days, slots) -> [day][professor][slot]
+    return matrix.transpose(1, 0, 2).tolist()
+
+
+ENGINES = {
+    "bitmask": bitmask_availability,
+    "numpy": numpy_availability,
+    "scan": scan_availability,
+}
+
+
+def generate_availability_schedule(
+    teachers_to_schedule: List[str], all_timings: TimingsDict, engine: str = "bitmask",
+    reused: Optional[ReusedAvailability] = None, grouping: str = "professor",
+) -> List[Dict[str, Any]]:
+    """
+    Generates schedule availability data for the given keys (professors by default, or
+    any GROUPINGS entry) and their timings. `engine` picks how availability is computed
+    (see ENGINES); all engines produce identical output. Keys found in `reused` are not
+    recomputed: their availability is copied from it.
+    """
+    list_key, entry_key = GROUPINGS[grouping].list_key, GROUPINGS[grouping].entry_key
+    reused = reused or {}
+    to_compute = [name for name in teachers_to_schedule if name not in reused]
+    print(f"Starting {entry_key} schedule data generation ({engine} engine): "
+          f"recomputing {len(to_compute)} {list_key}, reusing {len(teachers_to_schedule) - len(to_compute)}...")
+    computed_grid = ENGINES[engine](to_compute, all_timings) if to_compute else [[] for _ in DAYS_OF_WEEK]
+    schedule: List[Dict[str, Any]] = []
 
-        # Append the whole day's data to the schedule
+    for day, day_rows in zip(DAYS_OF_WEEK, computed_grid):
+        computed = dict(zip(to_compute, day_rows))
+        # *** UPDATED: Structure uses "professors" key (or "rooms" / "subjects") ***
+        day_data: Dict[str, Any] = {"day": day, list_key: [
+            # *** UPDATED: Structure uses "professor" key (or "room" / "subject") ***
+            {entry_key: teacher_name,
+             "availability": computed[teacher_name] if teacher_name in computed else reused[teacher_name][day]}
+            for teacher_name in teachers_to_schedule
+        ]}
         schedule.append(day_data)
 
-    print("Professor schedule data generation complete.")
+    print(f"{entry_key.capitalize()} schedule data generation complete.")
     return schedule
 
 
-def save_schedule_to_json(schedule_data: List[Dict[str, Any]]) -> bool:
-    """Saves the generated schedule data to a JSON file. Returns True on success."""
-    print(f"Saving professor schedule data to JSON file: {OUTPUT_JSON_PATH}...")
+def professor_timings_hash(teacher_name: str, all_timings: ProfessorTimingsDict) -> str:
+    """Hash of one professor's timing set across all days (order-insensitive)."""
+    entries = sorted(
+        (day, start, end)
+        for day in DAYS_OF_WEEK
+        for start, end in all_timings.get(day, {}).get(teacher_name, [])
+    )
+    return hashlib.sha1(json.dumps(entries).encode("utf-8")).hexdigest()[:16]
+
+
+def layout_hash() -> str:
+    """Hash of the days and slots; a change invalidates every stored entry."""
+    return hashlib.sha1(json.dumps([DAYS_OF_WEEK, TIME_SLOTS]).encode("utf-8")).hexdigest()[:16]
+
+
+def file_sha256(path: Path) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it doesn't exist."""
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.is_file() else None
+
+
+def load_reusable_availability(
+    manifest_path: Path, professor_hashes: Dict[str, str]
+) -> ReusedAvailability:
+    """
+    Availability of professors whose timing hash matches the manifest, read from the
+    previous scheduleData.json. Anything inconsistent (missing or edited output,
+    changed layout, unreadable files) means nothing is reused.
+    """
     try:
-        OUTPUT_JSON_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with OUTPUT_JSON_PATH.open("w", encoding="utf-8") as file:
+        with manifest_path.open("r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if (manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("layout") != layout_hash()
+                or manifest.get("output_sha256") != file_sha256(OUTPUT_JSON_PATH)):
+            print("Schedule manifest does not match the current output, recomputing everything.")
+            return {}
+        with OUTPUT_JSON_PATH.open("r", encoding="utf-8") as previous_file:
+            previous_schedule = json.load(previous_file)
+    except FileNotFoundError:
+        print("No schedule manifest from a previous run, recomputing everything.")
+        return {}
+    except (OSError, ValueError) as manifest_err:
+        print(f"Warning: could not read schedule manifest ({manifest_err}), recomputing everything.")
+        return {}
+
+    stored_hashes: Dict[str, str] = manifest.get("professors", {})
+    unchanged = {
+        name for name, timing_hash in professor_hashes.items()
+        if stored_hashes.get(name) == timing_hash
+    }
+    reused: ReusedAvailability = defaultdict(dict)
+    for day_data in previous_schedule:
+        for entry in day_data.get("professors", []):
+            if entry["professor"] in unchanged:
+                reused[entry["professor"]][day_data["day"]] = entry["availability"]
+    # Only professors with every day present can be carried over
+    return {name: days for name, days in reused.items() if len(days) == len(DAYS_OF_WEEK)}
+
+
+def save_schedule_manifest(manifest_path: Path, professor_hashes: Dict[str, str]) -> None:
+    """Records the per-professor hashes and the hash of the output just written."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "layout": layout_hash(),
+        "output_sha256": file_sha256(OUTPUT_JSON_PATH),
+        "professors": professor_hashes,
+    }
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        tmp_path.replace(manifest_path)
+    except OSError as manifest_err:
+        print(f"Warning: could not save schedule manifest: {manifest_err}", file=sys.stderr)
+
+
+def save_schedule_to_json(schedule_data: List[Dict[str, Any]], output_path: Optional[Path] = None) -> bool:
+    """Saves the generated schedule data to a JSON file (scheduleData.json by default). Returns True on success."""
+    output_path = output_path or OUTPUT_JSON_PATH
+    print(f"Saving schedule data to JSON file: {output_path}...")
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as file:
             # Dump the new structure to the same file path
             json.dump(schedule_data, file, indent=2)
-        print(f"Professor schedule data saved successfully to {OUTPUT_JSON_PATH.resolve()}")
+        print(f"Schedule data saved successfully to {output_path.resolve()}")
         return True
     except (IOError, OSError) as file_err:
         print(f"Error saving JSON file: {file_err}", file=sys.stderr)
@@ -248,34 +441,155 @@ def save_schedule_to_json(schedule_data: List[Dict[str, Any]]) -> bool:
     return False
 
 
+def save_compact_schedule(schedule_data: List[Dict[str, Any]]) -> bool:
+    """Writes the compact encoding, its .gz/.br copies and the manifest. Returns True on success."""
+    print("Writing compact schedule artifacts...")
+    try:
+        manifest = write_compact_artifacts(schedule_data, TIME_SLOTS, OUTPUT_JSON_PATH)
+        print(f"Compact schedule written (content hash {manifest['content_hash'][:12]}).")
+        return True
+    except (IOError, OSError, ValueError) as compact_err:
+        print(f"Error writing compact schedule: {compact_err}", file=sys.stderr)
+    except Exception as e:
+        print(f"An unexpected error occurred writing the compact schedule: {e}", file=sys.stderr)
+        traceback.print_exc()
+
+    return False
+
+
+def save_free_index(schedule_data: List[Dict[str, Any]]) -> bool:
+    """Writes the slot -> free-professors inverted index. Returns True on success."""
+    print(f"Writing free-professor index to {INDEX_JSON_PATH}...")
+    try:
+        written = write_free_index(build_free_index(schedule_data, TIME_SLOTS), INDEX_JSON_PATH)
+        print("Free-professor index saved." if written else "Free-professor index unchanged.")
+        return True
+    except (IOError, OSError) as index_err:
+        print(f"Error writing free-professor index: {index_err}", file=sys.stderr)
+    except Exception as e:
+        print(f"An unexpected error occurred writing the free-professor index: {e}", file=sys.stderr)
+        traceback.print_exc()
+
+    return False
+
+
+def save_transitions(teachers: List[str], all_timings: ProfessorTimingsDict) -> bool:
+    """Writes the per-professor next-transition table. Returns True on success."""
+    print(f"Writing next-transition table to {TRANSITIONS_JSON_PATH}...")
+    try:
+        document = build_transitions(teachers, all_timings, DAYS_OF_WEEK)
+        written = write_artifact(document, TRANSITIONS_JSON_PATH)
+        print("Next-transition table saved." if written else "Next-transition table unchanged.")
+        return True
+    except (IOError, OSError) as transitions_err:
+        print(f"Error writing next-transition table: {transitions_err}", file=sys.stderr)
+    except Exception as e:
+        print(f"An unexpected error occurred writing the next-transition table: {e}", file=sys.stderr)
+        traceback.print_exc()
+
+    return False
+
+
+def generate_outputs(grouped_timings: GroupedTimings, engine: str = "bitmask",
+                     manifest_path: Path = DEFAULT_MANIFEST_PATH, full: bool = False,
+                     compact: bool = False, index: bool = False, transitions: bool = False) -> bool:
+    """
+    Builds and saves the professor schedule (incrementally, see the manifest) and its
+    optional artifacts, plus the room / subject schedules for any other groupings in
+    grouped_timings. Returns True on success.
+    """
+    scheduled_teacher_list, all_professor_timings_data = grouped_timings["professor"]
+    if not scheduled_teacher_list:
+        print("Cannot generate schedule as no scheduled teachers were found.")
+        return False
+
+    # Only professors whose timing set changed since the last run are recomputed
+    timing_hashes = {
+        name: professor_timings_hash(name, all_professor_timings_data)
+        for name in scheduled_teacher_list
+    }
+    reusable = {} if full else load_reusable_availability(manifest_path, timing_hashes)
+    # Generate the availability data for these teachers
+    generated_schedule = generate_availability_schedule(
+        scheduled_teacher_list, all_professor_timings_data, engine=engine,
+        reused=reusable,
+    )
+    recomputed = len(scheduled_teacher_list) - len(reusable)
+    print(f"Recomputed {recomputed} professors ({recomputed * len(DAYS_OF_WEEK)} entries), "
+          f"reused {len(reusable)} ({len(reusable) * len(DAYS_OF_WEEK)} entries).")
+    # Save the result to the JSON file
+    success = save_schedule_to_json(generated_schedule)
+    if success:
+        save_schedule_manifest(manifest_path, timing_hashes)
+    if success and compact:
+        success = save_compact_schedule(generated_schedule)
+    if success and index:
+        success = save_free_index(generated_schedule)
+    if success and transitions:
+        success = save_transitions(scheduled_teacher_list, all_professor_timings_data)
+    # Rooms / subjects are cheap to recompute in full
+    for grouping in grouped_timings:
+        if grouping == "professor":
+            continue
+        if not success:
+            break
+        group_keys, group_timings = grouped_timings[grouping]
+        group_schedule = generate_availability_schedule(
+            group_keys, group_timings, engine=engine, grouping=grouping
+        )
+        success = save_schedule_to_json(group_schedule, GROUPINGS[grouping].output_path)
+    return success
+
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the professor (and optionally room / subject) availability JSON.")
+    parser.add_argument("--source", default="supabase", metavar="{supabase,csv,PATH}",
+                        help="Where timings come from: the Timings table (default), "
+                             f"'csv' for {DEFAULT_CSV_PATH.name}, or a path to a timetable CSV")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitmask",
+                        help="Availability engine (default: bitmask; numpy needs NumPy installed)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Also write scheduleData.compact.json (+ .gz/.br) and scheduleData.manifest.json")
+    parser.add_argument("--index", action="store_true",
+                        help=f"Also write the day x slot free-professor index ({INDEX_JSON_PATH.name})")
+    parser.add_argument("--transitions", action="store_true",
+                        help=f"Also write the per-professor next-transition table ({TRANSITIONS_JSON_PATH.name})")
+    parser.add_argument("--rooms", action="store_true",
+                        help=f"Also write room availability ({ROOMS_JSON_PATH.name}) from the same pass")
+    parser.add_argument("--subjects", action="store_true",
+                        help=f"Also write subject availability ({SUBJECTS_JSON_PATH.name}) from the same pass")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST_PATH,
+                        help=f"Per-professor hash manifest for incremental runs (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--full", action="store_true",
+                        help="Recompute every professor, ignoring the manifest")
+    args = parser.parse_args()
+
     print("Starting professor schedule generation process...")
     final_success = False
     try:
-        # Fetch the list of unique, relevant teachers from Timings
-        scheduled_teacher_list = fetch_scheduled_teachers()
-        # Fetch all timings grouped by day and teacher
-        all_professor_timings_data = fetch_all_professor_timings()
-
-        if scheduled_teacher_list:
-            # Generate the availability data for these teachers
-            generated_schedule = generate_professor_schedule(
-                scheduled_teacher_list, all_professor_timings_data
-            )
-            # Save the result to the JSON file
-            final_success = save_schedule_to_json(generated_schedule)
+        # One pass over the source yields the key list and day grouping of every grouping
+        groupings = ["professor"]
+        if args.rooms:
+            groupings.append("room")
+        if args.subjects:
+            groupings.append("subject")
+        if args.source == "supabase":
+            grouped_timings = load_timings(groupings)
         else:
-            print("Cannot generate schedule as no scheduled teachers were found.")
-            final_success = False
+            source_path = DEFAULT_CSV_PATH if args.source == "csv" else Path(args.source)
+            grouped_timings = load_timings_from_csv(source_path, groupings)
+        final_success = generate_outputs(
+            grouped_timings, engine=args.engine, manifest_path=args.manifest, full=args.full,
+            compact=args.compact, index=args.index, transitions=args.transitions,
+        )
 
     except (RuntimeError, Exception) as main_err:
         print(f"Script failed: {main_err}", file=sys.stderr)
         final_success = False
     finally:
-        # Attempt to disconnect
-        supabase.rpc("disconnect_db", {}) # Or appropriate disconnect method
-        print("Supabase client disconnected (attempted).")
+        # Close pooled connections (no-op if the run never connected)
+        close_shared_client()
 
 
     if final_success:
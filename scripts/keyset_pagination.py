@@ -0,0 +1,166 @@
+# \scripts\keyset_pagination.py
+"""
+Parallel keyset pagination over a Supabase table with an integer `id` primary key.
+
+OFFSET pagination (`.range(offset, offset + 999)`) makes the server skip every row
+before the offset, so later pages get slower as the table grows. Here:
+  * the id space [min id, max id] is split into contiguous ranges
+  * each range is read by a worker of a bounded thread pool with keyset pages
+    (`id > last_id ORDER BY id LIMIT n`), which stay cheap at any depth
+  * AdaptivePageSize grows or shrinks the page size (shared by all workers) so a
+    page takes roughly `target_latency` seconds
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+
+# --- Defaults ---
+DEFAULT_WORKERS = 4
+DEFAULT_TARGET_LATENCY = 0.5  # Seconds per page the page size is tuned towards
+MIN_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000  # Supabase caps responses at 1000 rows by default
+ID_COLUMN = "id"
+
+Row = Dict[str, Any]
+QueryFilter = Callable[[Any], Any]
+
+
+class AdaptivePageSize:
+    """
+    Thread-safe page size that doubles while pages come back well under the target
+    latency and halves when they take too long, within [minimum, maximum].
+    """
+
+    def __init__(self, initial: int = MAX_PAGE_SIZE, minimum: int = MIN_PAGE_SIZE,
+                 maximum: int = MAX_PAGE_SIZE, target_latency: float = DEFAULT_TARGET_LATENCY):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(self.maximum, max(self.minimum, initial))
+        self.target_latency = target_latency
+        self.lock = threading.Lock()
+
+    def current(self) -> int:
+        """Page size to request next."""
+        with self.lock:
+            return self.size
+
+    def observe(self, rows: int, seconds: float) -> None:
+        """Record how long a full page of `rows` took and adjust the page size."""
+        with self.lock:
+            if rows < self.size:
+                return  # Short (last) pages say little about throughput
+            if seconds > self.target_latency * 1.5:
+                self.size = max(self.minimum, self.size // 2)
+            elif seconds < self.target_latency / 2:
+                self.size = min(self.maximum, self.size * 2)
+
+
+def fetch_id_bounds(client: Any, table: str,
+                    apply_filters: Optional[QueryFilter] = None) -> Optional[Tuple[int, int]]:
+    """(smallest id, largest id) of the matching rows, or None if there are none."""
+    bounds = []
+    for descending in (False, True):
+        query = client.table(table).select(ID_COLUMN)
+        if apply_filters:
+            query = apply_filters(query)
+        response = query.order(ID_COLUMN, desc=descending).limit(1).execute()
+        if not response.data:
+            return None
+        bounds.append(response.data[0][ID_COLUMN])
+    return bounds[0], bounds[1]
+
+
+def split_id_range(low: int, high: int, parts: int) -> List[Tuple[int, int]]:
+    """Splits the inclusive range [low, high] into up to `parts` contiguous ranges."""
+    span = high - low + 1
+    parts = max(1, min(parts, span))
+    step, extra = divmod(span, parts)
+    ranges = []
+    start = low
+    for index in range(parts):
+        end = start + step - 1 + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def fetch_id_range(client: Any, table: str, columns: str, low: int, high: int,
+                   page_size: AdaptivePageSize,
+                   apply_filters: Optional[QueryFilter] = None) -> List[Row]:
+    """Reads every matching row with low <= id <= high, one keyset page at a time."""
+    rows: List[Row] = []
+    last_id = low - 1
+    while True:
+        limit = page_size.current()
+        query = client.table(table).select(columns).gt(ID_COLUMN, last_id).lte(ID_COLUMN, high)
+        if apply_filters:
+            query = apply_filters(query)
+        started = time.perf_counter()
+        response = query.order(ID_COLUMN).limit(limit).execute()
+        page_size.observe(len(response.data or []), time.perf_counter() - started)
+
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        last_id = page[-1][ID_COLUMN]
+
+
+def iter_rows_by_id(client: Any, table: str, columns: str,
+                    apply_filters: Optional[QueryFilter] = None,
+                    workers: int = DEFAULT_WORKERS,
+                    page_size: Optional[AdaptivePageSize] = None) -> Iterator[List[Row]]:
+    """
+    Yields the rows of each id range as soon as its worker finishes (in completion
+    order, so the overall row order is not guaranteed). `columns` must include `id`.
+    """
+    bounds = fetch_id_bounds(client, table, apply_filters)
+    if bounds is None:
+        return
+    page_size = page_size or AdaptivePageSize()
+    ranges = split_id_range(bounds[0], bounds[1], workers)
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(fetch_id_range, client, table, columns, low, high,
+                            page_size, apply_filters)
+            for low, high in ranges
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def fetch_rows_by_id(client: Any, table: str, columns: str,
+                     apply_filters: Optional[QueryFilter] = None,
+                     workers: int = DEFAULT_WORKERS) -> List[Row]:
+    """Every matching row of the table, merged from all ranges and ordered by id."""
+    rows: List[Row] = []
+    for range_rows in iter_rows_by_id(client, table, columns, apply_filters, workers):
+        rows.extend(range_rows)
+    rows.sort(key=lambda row: row[ID_COLUMN])
+    return rows
+
+
+def fetch_rows_sequential(client: Any, table: str, columns: str,
+                          apply_filters: Optional[QueryFilter] = None,
+                          page_size: int = MAX_PAGE_SIZE) -> List[Row]:
+    """
+    Every matching row ordered by id, read with sequential keyset pages and no bounds
+    queries: a single request for tables smaller than page_size (e.g. Teacher), where
+    fetch_rows_by_id would spend two extra requests on the id bounds.
+    """
+    rows: List[Row] = []
+    last_id: Optional[int] = None
+    while True:
+        query = client.table(table).select(columns)
+        if last_id is not None:
+            query = query.gt(ID_COLUMN, last_id)
+        if apply_filters:
+            query = apply_filters(query)
+        page = query.order(ID_COLUMN).limit(page_size).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1][ID_COLUMN]
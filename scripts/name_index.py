@@ -0,0 +1,204 @@
+# \scripts\name_index.py
+"""
+Professor name normalisation and an in-memory name index for lookups and dedup.
+
+normalize_name applies Unicode NFKC, casefolding, punctuation and whitespace cleanup
+and strips honorifics ("Dr.", "Prof.", "PhD", ...), so "Dr. John  Smith" and
+"john smith" share one key. NameIndex keeps:
+  * an exact index: normalised key -> entries
+  * a trigram index: trigram -> keys, for approximate lookup by trigram (Jaccard)
+    similarity, the same measure as PostgreSQL's pg_trgm
+Lookups touch only the keys sharing a trigram with the query, so they stay well
+under a millisecond for rosters of thousands of names.
+
+Usage (duplicate-cluster report):
+  python name_index.py                     # names in public/classes.csv
+  python name_index.py --source supabase   # names in the Teacher table
+"""
+
+import argparse
+import csv
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple, Iterable, DefaultDict
+
+# --- Configuration ---
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_CSV_PATH = SCRIPT_DIR.parent / "public" / "classes.csv"
+DEFAULT_SIMILARITY = 0.5  # Minimum trigram similarity for approximate matches
+DEFAULT_CLUSTER_SIMILARITY = 0.75  # Stricter threshold for the duplicate report
+# Titles dropped from the start of a name, and degrees dropped from the end
+HONORIFICS = {
+    "dr", "doctor", "prof", "professor", "assoc", "associate", "asst", "assistant",
+    "mr", "mrs", "ms", "miss", "mx", "sir", "dame", "eng", "engr",
+}
+POST_NOMINALS = {"phd", "dphil", "edd", "md", "msc", "mba", "jr", "sr"}
+# Punctuation replaced by spaces; hyphens and apostrophes are part of names
+_PUNCTUATION_RE = re.compile(r"[.,;:()\[\]{}\"/\\_]+")
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Canonical key of a name: NFKC, casefold, punctuation to spaces, honorifics and
+    degrees stripped, whitespace collapsed. Returns "" for empty names.
+    """
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKC", name).casefold()
+    text = text.replace("’", "'")  # Curly apostrophes
+    tokens = _PUNCTUATION_RE.sub(" ", text).split()
+    while len(tokens) > 1 and tokens[0] in HONORIFICS:
+        tokens.pop(0)
+    while len(tokens) > 1 and tokens[-1] in POST_NOMINALS:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def trigrams(key: str) -> Set[str]:
+    """pg_trgm-style trigrams of a normalised key (each word padded with spaces)."""
+    grams: Set[str] = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(first: str, second: str) -> float:
+    """Trigram (Jaccard) similarity of two names, 0..1."""
+    first_grams = trigrams(normalize_name(first))
+    second_grams = trigrams(normalize_name(second))
+    if not first_grams or not second_grams:
+        return 0.0
+    shared = len(first_grams & second_grams)
+    return shared / (len(first_grams) + len(second_grams) - shared)
+
+
+class NameIndex:
+    """Exact and approximate name lookup over (name, payload) entries."""
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]] = ()):
+        self.by_key: DefaultDict[str, List[Tuple[str, Any]]] = defaultdict(list)
+        self.key_grams: Dict[str, Set[str]] = {}
+        self.keys_by_gram: DefaultDict[str, Set[str]] = defaultdict(set)
+        for name, payload in entries:
+            self.add(name, payload)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.by_key.values())
+
+    def add(self, name: str, payload: Any = None) -> None:
+        """Index one name. Names that normalise to "" are ignored."""
+        key = normalize_name(name)
+        if not key:
+            return
+        self.by_key[key].append((name, payload))
+        if key not in self.key_grams:
+            grams = trigrams(key)
+            self.key_grams[key] = grams
+            for gram in grams:
+                self.keys_by_gram[gram].add(key)
+
+    def exact(self, name: str) -> List[Tuple[str, Any]]:
+        """Entries whose normalised name equals name's."""
+        return list(self.by_key.get(normalize_name(name), []))
+
+    def approximate(self, name: str, limit: Optional[int] = 5,
+                    threshold: float = DEFAULT_SIMILARITY) -> List[Tuple[float, str, Any]]:
+        """
+        Up to `limit` (None: all) (similarity, name, payload) entries with similarity
+        >= threshold, best first. Exact key matches score 1.0.
+        """
+        query_grams = trigrams(normalize_name(name))
+        if not query_grams:
+            return []
+        shared: DefaultDict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for key in self.keys_by_gram.get(gram, ()):
+                shared[key] += 1
+
+        scored: List[Tuple[float, str]] = []
+        for key, count in shared.items():
+            score = count / (len(query_grams) + len(self.key_grams[key]) - count)
+            if score >= threshold:
+                scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        results: List[Tuple[float, str, Any]] = []
+        for score, key in scored:
+            for entry_name, payload in self.by_key[key]:
+                results.append((round(score, 3), entry_name, payload))
+        return results if limit is None else results[:limit]
+
+    def duplicate_clusters(self, threshold: float = DEFAULT_CLUSTER_SIMILARITY) -> List[List[str]]:
+        """
+        Groups of indexed names that are probably the same person: identical keys, or
+        keys linked by similarity >= threshold (transitively). Singletons are omitted.
+        """
+        parent = {key: key for key in self.by_key}
+
+        def find(key: str) -> str:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for key in self.by_key:
+            for _score, other_name, _payload in self.approximate(key, limit=None, threshold=threshold):
+                other_key = normalize_name(other_name)
+                if other_key != key:
+                    parent[find(other_key)] = find(key)
+
+        clusters: DefaultDict[str, List[str]] = defaultdict(list)
+        for key, entries in self.by_key.items():
+            clusters[find(key)].extend(name for name, _payload in entries)
+        return sorted(
+            (sorted(set(names)) for names in clusters.values() if len(names) > 1),
+            key=lambda names: names[0].casefold(),
+        )
+
+
+def read_csv_teacher_names(csv_path: Path) -> List[str]:
+    """Distinct, stripped Teacher values of a timetable CSV."""
+    with csv_path.open("r", newline="", encoding="utf-8") as csv_file:
+        return sorted({
+            (row.get("Teacher") or "").strip()
+            for row in csv.DictReader(csv_file)
+            if (row.get("Teacher") or "").strip()
+        })
+
+
+# --- Main Execution ---
+def main():
+    """Print the duplicate-cluster report for the chosen name source."""
+    parser = argparse.ArgumentParser(description="Report probable duplicate professor names.")
+    parser.add_argument("--source", default="csv", metavar="{csv,supabase,PATH}",
+                        help="Names from public/classes.csv (default), the Teacher table, or a timetable CSV")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_CLUSTER_SIMILARITY,
+                        help=f"Trigram similarity linking two names (default: {DEFAULT_CLUSTER_SIMILARITY})")
+    args = parser.parse_args()
+
+    if args.source == "supabase":
+        # Imported here so CSV reports need no DB configuration
+        from db_connection import supabase_connection
+        from keyset_pagination import fetch_rows_by_id
+        with supabase_connection() as client:
+            names = [row["Name"] for row in fetch_rows_by_id(client, "Teacher", "id, Name") if row.get("Name")]
+    else:
+        csv_path = DEFAULT_CSV_PATH if args.source == "csv" else Path(args.source)
+        if not csv_path.is_file():
+            print(f"Error: CSV file not found at {csv_path}", file=sys.stderr)
+            sys.exit(1)
+        names = read_csv_teacher_names(csv_path)
+
+    index = NameIndex((name, None) for name in names)
+    clusters = index.duplicate_clusters(args.threshold)
+    print(f"Indexed {len(index)} names; {len(clusters)} probable duplicate cluster(s):")
+    for cluster in clusters:
+        print("  - " + " | ".join(cluster))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# \scripts\page_archive.py
+"""
+Content-addressed archive of fetched timetable pages, and offline replay of them.
+
+Layout of an archive directory:
+  objects/<sha[:2]>/<sha256>.html.gz   gzip-compressed page bodies, keyed by SHA-256
+  runs/<run_id>.json                   one manifest per scraper run: the pages fetched
+                                       (URL, hash, status, headers, timestamp), the
+                                       target semester and the room mapping used
+
+Identical pages are stored once, so archiving every cron run costs little disk.
+"""
+
+import datetime
+import gzip
+import hashlib
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, List, Any
+
+# Response headers worth keeping alongside the body
+ARCHIVED_HEADERS = ("Content-Type", "Date", "ETag", "Last-Modified")
+
+
+class ArchivedResponse:
+    """Minimal stand-in for a requests.Response, served from the archive."""
+
+    def __init__(self, url: str, content: bytes, status_code: int,
+                 headers: Dict[str, str], encoding: Optional[str]):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self) -> str:
+        """Decoded body, like requests.Response.text."""
+        return self.content.decode(self.encoding, errors="replace")
+
+    def raise_for_status(self) -> None:
+        """Archived pages were all successful fetches."""
+
+
+class PageArchive:
+    """Writes pages and a run manifest into an archive directory (thread-safe)."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.run_id = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self.pages: List[Dict[str, Any]] = []
+        self.run_info: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def object_path(self, sha256: str) -> Path:
+        """Path of the compressed body with the given hash."""
+        return self.root / "objects" / sha256[:2] / f"{sha256}.html.gz"
+
+    def store_page(self, url: str, response: Any) -> str:
+        """Archive a fetched page body (deduplicated by hash). Returns its SHA-256."""
+        content: bytes = response.content
+        sha256 = hashlib.sha256(content).hexdigest()
+        object_path = self.object_path(sha256)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            # Unique temp file: workers storing the same page must not share one
+            with tempfile.NamedTemporaryFile(dir=object_path.parent, suffix=".tmp", delete=False) as tmp_file:
+                with gzip.GzipFile(fileobj=tmp_file, mode="wb") as object_file:
+                    object_file.write(content)
+            Path(tmp_file.name).replace(object_path)
+
+        record = {
+            "url": url,
+            "sha256": sha256,
+            "size": len(content),
+            "status_code": response.status_code,
+            "encoding": response.encoding,
+            "headers": {
+                name: response.headers[name]
+                for name in ARCHIVED_HEADERS
+                if response.headers.get(name)
+            },
+            "fetched_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        with self.lock:
+            self.pages.append(record)
+        return sha256
+
+    def record(self, **info: Any) -> None:
+        """Attach run-level metadata (e.g. semester_id, room_mapping) to the manifest."""
+        with self.lock:
+            self.run_info.update(info)
+
+    def save_run(self) -> Optional[Path]:
+        """Write this run's manifest. Runs that fetched nothing are not recorded."""
+        if not self.pages:
+            return None
+        manifest_path = self.root / "runs" / f"{self.run_id}.json"
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with manifest_path.open("w", encoding="utf-8") as manifest_file:
+            json.dump({"run_id": self.run_id, "pages": self.pages, **self.run_info},
+                      manifest_file, indent=2)
+        print(f"Archived {len(self.pages)} page(s) to {manifest_path}")
+        return manifest_path
+
+
+class ReplayArchive:
+    """Serves the pages of one archived run by URL, with no network access."""
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        # Manifests live in <root>/runs/, objects in <root>/objects/
+        self.root = manifest_path.parent.parent
+        with manifest_path.open("r", encoding="utf-8") as manifest_file:
+            self.manifest: Dict[str, Any] = json.load(manifest_file)
+        # Last fetch of a URL wins (retries/refetches append new records)
+        self.pages: Dict[str, Dict[str, Any]] = {
+            page["url"]: page for page in self.manifest.get("pages", [])
+        }
+
+    @classmethod
+    def open(cls, path: Path) -> "ReplayArchive":
+        """Open a run manifest, or the most recent run of an archive directory."""
+        if path.is_dir():
+            runs = sorted((path / "runs").glob("*.json"))
+            if not runs:
+                raise FileNotFoundError(f"No archived runs found in {path / 'runs'}")
+            path = runs[-1]
+        print(f"Replaying archived run: {path}")
+        return cls(path)
+
+    @property
+    def semester_id(self) -> Optional[str]:
+        """Target semester ID recorded by the archived run."""
+        return self.manifest.get("semester_id")
+
+    @property
+    def room_mapping(self) -> Optional[Dict[str, str]]:
+        """Room mapping used by the archived run, if it was recorded."""
+        return self.manifest.get("room_mapping")
+
+    def load_page(self, url: str) -> ArchivedResponse:
+        """Return the archived response for url. Raises RuntimeError if missing."""
+        page = self.pages.get(url)
+        if page is None:
+            raise RuntimeError(f"Page not in archived run {self.manifest_path.name}: {url}")
+        object_path = self.root / "objects" / page["sha256"][:2] / f"{page['sha256']}.html.gz"
+        with gzip.open(object_path, "rb") as object_file:
+            content = object_file.read()
+        return ArchivedResponse(url, content, page.get("status_code", 200),
+                                page.get("headers", {}), page.get("encoding"))
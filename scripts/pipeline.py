@@ -0,0 +1,260 @@
+# \scripts\pipeline.py
+"""
+Runs the timetable update stages in one process:
+
+  scrape    scrape_timetable.py   -> public/classes.csv
+  sync      sync_timings.py       -> Timings table
+  teachers  update_teachers.py    -> Teacher table
+  generate  generate_schedule.py  -> public/scheduleData*.json, roomScheduleData.json
+
+The rows the scraper builds are handed to the later stages in memory (the CSV is read
+once, only when the scrape stage did not run or produced nothing new), all stages
+share one pooled Supabase client, and libraries are imported once.
+
+A stage is skipped when its input rows hash to the same value as on its last
+successful run (recorded in scripts/.cache/pipeline_state.json), so an unchanged
+timetable costs one conditional fetch, while a stage that failed last time is retried
+even if the scrape sees no change. Per-stage wall times are printed at the end.
+
+Exit codes match scrape_timetable.py: 0 when something ran, 3 when every selected
+stage was unchanged, 1 on failure.
+
+Usage:
+  python pipeline.py                          # all stages
+  python pipeline.py --stages sync,generate   # from the existing classes.csv
+  python pipeline.py --force                  # ignore scrape and pipeline state
+"""
+
+import argparse
+import json
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+# Local imports
+from db_connection import close_shared_client
+from generate_schedule import DEFAULT_CSV_PATH, generate_outputs, load_timings_from_rows
+from scrape_timetable import (
+    CACHE_DIR,
+    DEFAULT_SESSION_CACHE_PATH,
+    DEFAULT_STATE_PATH,
+    EXIT_FAILURE,
+    EXIT_SUCCESS,
+    EXIT_UNCHANGED,
+    TimetableScraper,
+    hash_payload,
+)
+from sync_timings import sync_target_rows, target_rows_from
+from timetable_changes import read_csv_rows
+from update_teachers import fetch_existing_teacher_names, find_new_teachers, insert_new_teachers
+
+# --- Configuration ---
+STAGES = ("scrape", "sync", "teachers", "generate")
+DEFAULT_PIPELINE_STATE_PATH = CACHE_DIR / "pipeline_state.json"
+# Groupings and artifacts the generate stage writes (as in the workflow before the pipeline)
+GENERATE_GROUPINGS = ("professor", "room")
+
+Rows = List[Dict[str, str]]
+
+
+def parse_stages(spec: str) -> List[str]:
+    """'all' or a comma-separated subset of STAGES -> stage names in pipeline order."""
+    if spec.strip().lower() == "all":
+        return list(STAGES)
+    names = [name.strip().lower() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in STAGES]
+    if unknown or not names:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown) or spec!r}; choose from {', '.join(STAGES)}")
+    return [stage for stage in STAGES if stage in names]
+
+
+def load_pipeline_state(state_path: Path) -> Dict[str, str]:
+    """Stage name -> input hash of its last successful run. Missing/corrupt state is empty."""
+    try:
+        with state_path.open("r", encoding="utf-8") as state_file:
+            state = json.load(state_file)
+        if isinstance(state, dict):
+            return {str(stage): str(value) for stage, value in state.items()}
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as state_err:
+        print(f"Warning: Ignoring unreadable pipeline state {state_path}: {state_err}")
+    return {}
+
+
+def save_pipeline_state(state_path: Path, state: Dict[str, str]) -> None:
+    """Writes the pipeline state atomically."""
+    try:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as state_file:
+            json.dump(state, state_file, indent=2, sort_keys=True)
+        tmp_path.replace(state_path)
+    except OSError as state_err:
+        print(f"Warning: Could not save pipeline state {state_path}: {state_err}")
+
+
+# --- Stages ---
+# Each downstream stage takes the timetable rows (CSV shape, unpadded times) and
+# returns True on success. Stages never modify the rows they are given.
+
+def run_sync_stage(rows: Rows) -> bool:
+    """Brings the Timings table in line with the rows. Incomplete rows fail the stage."""
+    try:
+        target_rows = target_rows_from(rows, "the scraped timetable")
+    except ValueError as rows_err:
+        print(f"Error: {rows_err}", file=sys.stderr)
+        return False
+    return sync_target_rows(target_rows)
+
+
+def run_teachers_stage(rows: Rows) -> bool:
+    """Adds the rows' new teachers to the Teacher table."""
+    return insert_new_teachers(find_new_teachers(rows, fetch_existing_teacher_names()))
+
+
+def run_generate_stage(rows: Rows) -> bool:
+    """Writes the professor / room schedules and their lookup artifacts."""
+    grouped_timings = load_timings_from_rows(rows, GENERATE_GROUPINGS)
+    return generate_outputs(grouped_timings, compact=True, index=True, transitions=True)
+
+
+STAGE_RUNNERS: Dict[str, Callable[[Rows], bool]] = {
+    "sync": run_sync_stage,
+    "teachers": run_teachers_stage,
+    "generate": run_generate_stage,
+}
+
+
+class Pipeline:
+    """One pipeline run: selected stages, shared rows and per-stage timings."""
+
+    def __init__(self, stages: List[str], output_path: Path, force: bool = False,
+                 state_path: Path = DEFAULT_PIPELINE_STATE_PATH):
+        self.stages = stages
+        self.output_path = output_path
+        self.force = force
+        self.state_path = state_path
+        self.state = load_pipeline_state(state_path)
+        # (stage, outcome, seconds) in run order
+        self.timings: List[Tuple[str, str, float]] = []
+
+    def timed(self, stage: str, action: Callable[[], Tuple[str, Any]]) -> Any:
+        """Runs action, recording its outcome and wall time. Returns the action's value."""
+        print(f"\n===== Stage: {stage} =====")
+        started = time.perf_counter()
+        try:
+            outcome, value = action()
+        except Exception as stage_err:
+            print(f"Stage '{stage}' failed: {type(stage_err).__name__} - {stage_err}", file=sys.stderr)
+            traceback.print_exc()
+            outcome, value = "failed", None
+        self.timings.append((stage, outcome, time.perf_counter() - started))
+        return value
+
+    def scrape(self) -> Tuple[int, Optional[Rows]]:
+        """Runs the scraper. Returns (exit status, rows it built or None)."""
+        def action() -> Tuple[str, Tuple[int, Optional[Rows]]]:
+            scraper = TimetableScraper(
+                state_path=DEFAULT_STATE_PATH,
+                session_cache_path=DEFAULT_SESSION_CACHE_PATH,
+            )
+            status = scraper.scrape(self.output_path, force=self.force)
+            outcome = {EXIT_SUCCESS: "changed", EXIT_UNCHANGED: "unchanged"}.get(status, "failed")
+            return outcome, (status, scraper.rows_by_output.get(self.output_path))
+
+        result = self.timed("scrape", action)
+        return result if result is not None else (EXIT_FAILURE, None)
+
+    def run_stage(self, stage: str, rows: Rows, rows_hash: str) -> bool:
+        """Runs one downstream stage unless its input is unchanged. Returns False on failure."""
+        if not self.force and self.state.get(stage) == rows_hash:
+            print(f"\n===== Stage: {stage} =====\nInput unchanged since its last successful run, skipping.")
+            self.timings.append((stage, "skipped", 0.0))
+            return True
+
+        def action() -> Tuple[str, bool]:
+            success = STAGE_RUNNERS[stage](rows)
+            return ("ok" if success else "failed"), success
+
+        if not self.timed(stage, action):
+            return False
+        self.state[stage] = rows_hash
+        save_pipeline_state(self.state_path, self.state)
+        return True
+
+    def run(self) -> int:
+        """Runs the selected stages in order. Returns EXIT_SUCCESS, EXIT_UNCHANGED or EXIT_FAILURE."""
+        rows: Optional[Rows] = None
+        if "scrape" in self.stages:
+            status, rows = self.scrape()
+            if status == EXIT_FAILURE:
+                return EXIT_FAILURE
+
+        downstream = [stage for stage in self.stages if stage in STAGE_RUNNERS]
+        if downstream and rows is None:
+            # The scraper left the CSV as is (or did not run): read it once for every stage
+            rows = read_csv_rows(self.output_path)
+            print(f"\nRead {len(rows)} rows from {self.output_path}")
+            if not rows:
+                print(f"Error: No timetable rows in {self.output_path}.", file=sys.stderr)
+                return EXIT_FAILURE
+
+        if downstream:
+            rows_hash = hash_payload(rows)
+            for stage in downstream:
+                if not self.run_stage(stage, rows, rows_hash):
+                    return EXIT_FAILURE
+
+        ran = any(outcome not in ("unchanged", "skipped") for _stage, outcome, _seconds in self.timings)
+        return EXIT_SUCCESS if ran else EXIT_UNCHANGED
+
+    def print_report(self) -> None:
+        """Per-stage outcome and wall time."""
+        print("\n===== Pipeline stage timings =====")
+        for stage, outcome, seconds in self.timings:
+            print(f"  {stage:<10} {outcome:<10} {seconds:8.2f}s")
+        print(f"  {'total':<10} {'':<10} {sum(seconds for _s, _o, seconds in self.timings):8.2f}s")
+
+
+# --- Main Execution ---
+def main():
+    """Parse args and run the selected stages."""
+    parser = argparse.ArgumentParser(description="Run the timetable update stages in one process.")
+    parser.add_argument("--stages", default="all",
+                        help=f"Comma-separated stages to run, in pipeline order: {', '.join(STAGES)} (default: all)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_CSV_PATH,
+                        help=f"Timetable CSV the scrape stage writes and later stages read (default: {DEFAULT_CSV_PATH})")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the scrape state and the pipeline state: run every selected stage")
+    parser.add_argument("--state-file", type=Path, default=DEFAULT_PIPELINE_STATE_PATH,
+                        help=f"Per-stage input hashes of the last successful runs (default: {DEFAULT_PIPELINE_STATE_PATH})")
+    args = parser.parse_args()
+
+    try:
+        stages = parse_stages(args.stages)
+    except ValueError as stage_err:
+        parser.error(str(stage_err))
+
+    # Resolved like scrape_timetable.py does, so both share the scrape state entries
+    pipeline = Pipeline(stages, args.output.resolve(), force=args.force, state_path=args.state_file)
+    print(f"Running pipeline stages: {', '.join(stages)}")
+    try:
+        status = pipeline.run()
+    finally:
+        close_shared_client()
+        pipeline.print_report()
+
+    if status == EXIT_FAILURE:
+        print("Pipeline finished with errors.", file=sys.stderr)
+    elif status == EXIT_UNCHANGED:
+        print("Pipeline finished: nothing changed.")
+    else:
+        print("Pipeline finished successfully.")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
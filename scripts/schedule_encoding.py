@@ -0,0 +1,141 @@
+# \scripts\schedule_encoding.py
+"""
+Compact, versioned encoding of the professor schedule, written next to scheduleData.json.
+
+scheduleData.compact.json:
+  {
+    "version": 1,
+    "days": ["Monday", ...],
+    "slots": ["08:30", "09:00", ...],        # slot i runs from slots[i] to slots[i+1]
+    "professors": ["Aaron Anderson", ...],   # shared name table
+    "availability": {"Monday": ["8AAP", ...], ...}
+  }
+Each availability string is one professor's day (same order as "professors"): a
+base64 little-endian bitmask where bit i set = slot i is free.
+
+The compact file is also written precompressed (.gz, and .br when the brotli package
+is installed), and scheduleData.manifest.json records the SHA-256 and size of every
+artifact plus a content hash the frontend can use as a cache key.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Sequence
+
+try:
+    import brotli
+except ImportError:  # .br output is skipped without the brotli package
+    brotli = None
+
+# Local imports
+from timetable_changes import write_if_changed
+
+COMPACT_VERSION = 1
+
+
+def pack_availability(availability: Sequence[int]) -> str:
+    """[1, 0, 1, ...] -> base64 of the little-endian bitmask (bit i = slot i free)."""
+    mask = 0
+    for index, free in enumerate(availability):
+        if free:
+            mask |= 1 << index
+    packed = mask.to_bytes((len(availability) + 7) // 8, "little")
+    return base64.b64encode(packed).decode("ascii")
+
+
+def unpack_availability(encoded: str, slot_count: int) -> List[int]:
+    """Inverse of pack_availability."""
+    mask = int.from_bytes(base64.b64decode(encoded), "little")
+    return [(mask >> index) & 1 for index in range(slot_count)]
+
+
+def encode_compact(schedule: List[Dict[str, Any]], time_slots: Sequence[str]) -> Dict[str, Any]:
+    """Builds the compact document from the scheduleData.json structure."""
+    professors: List[str] = []
+    professor_index: Dict[str, int] = {}
+    for day_data in schedule:
+        for entry in day_data["professors"]:
+            if entry["professor"] not in professor_index:
+                professor_index[entry["professor"]] = len(professors)
+                professors.append(entry["professor"])
+
+    slot_count = len(time_slots) - 1
+    all_free = pack_availability([1] * slot_count)
+    availability: Dict[str, List[str]] = {}
+    for day_data in schedule:
+        day_masks = [all_free] * len(professors)
+        for entry in day_data["professors"]:
+            day_masks[professor_index[entry["professor"]]] = pack_availability(entry["availability"])
+        availability[day_data["day"]] = day_masks
+
+    return {
+        "version": COMPACT_VERSION,
+        "days": [day_data["day"] for day_data in schedule],
+        "slots": list(time_slots),
+        "professors": professors,
+        "availability": availability,
+    }
+
+
+def decode_compact(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expands a compact document back into the scheduleData.json structure."""
+    if document.get("version") != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact schedule version: {document.get('version')}")
+    slot_count = len(document["slots"]) - 1
+    return [
+        {
+            "day": day,
+            "professors": [
+                {"professor": name, "availability": unpack_availability(encoded, slot_count)}
+                for name, encoded in zip(document["professors"], document["availability"][day])
+            ],
+        }
+        for day in document["days"]
+    ]
+
+
+def _file_entry(content: bytes) -> Dict[str, Any]:
+    return {"sha256": hashlib.sha256(content).hexdigest(), "bytes": len(content)}
+
+
+def write_compact_artifacts(schedule: List[Dict[str, Any]], time_slots: Sequence[str],
+                            json_path: Path) -> Dict[str, Any]:
+    """
+    Writes <stem>.compact.json (+ .gz / .br) and <stem>.manifest.json next to json_path.
+    Files are only rewritten when their bytes change. Returns the manifest.
+    """
+    document = encode_compact(schedule, time_slots)
+    if decode_compact(document) != schedule:
+        raise ValueError("Compact schedule encoding does not round-trip.")
+
+    compact_path = json_path.with_name(f"{json_path.stem}.compact.json")
+    compact = json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    artifacts = {compact_path: compact}
+    # mtime=0 keeps the gzip bytes (and so the hash) stable across runs
+    artifacts[compact_path.with_name(compact_path.name + ".gz")] = gzip.compress(compact, 9, mtime=0)
+    if brotli is not None:
+        artifacts[compact_path.with_name(compact_path.name + ".br")] = brotli.compress(compact, quality=11)
+    else:
+        print("Note: brotli is not installed, skipping the .br artifact.")
+
+    files = {}
+    if json_path.is_file():
+        files[json_path.name] = _file_entry(json_path.read_bytes())
+    for path, content in artifacts.items():
+        write_if_changed(path, content)
+        files[path.name] = _file_entry(content)
+
+    manifest = {
+        "version": COMPACT_VERSION,
+        "content_hash": hashlib.sha256(compact).hexdigest(),
+        "compact": compact_path.name,
+        "files": files,
+    }
+    manifest_path = json_path.with_name(f"{json_path.stem}.manifest.json")
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2) + "\n")
+    for name, entry in files.items():
+        print(f"  {name}: {entry['bytes'] / 1024:.1f} KiB")
+    return manifest
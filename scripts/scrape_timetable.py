@@ -4,15 +4,20 @@
 
 import argparse
 import csv
+import hashlib
 import json
+import os
 import random
 import re
 import sys
+import threading
 import time
 import datetime
 import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 
 # Third-party imports
 import cloudscraper
@@ -21,13 +26,47 @@ from httpx import RequestError, HTTPStatusError, TimeoutException
 from postgrest.exceptions import APIError  # If using supabase-py v1 or similar
 
 # Local imports
-from db_connection import get_supabase_client
+from db_connection import close_shared_client, get_shared_client
+from fetch_policy import (
+    DEFAULT_BACKOFF_BASE,
+    DEFAULT_BACKOFF_CAP,
+    DEFAULT_BURST,
+    DEFAULT_RATE,
+    BackoffPolicy,
+    FetchPolicy,
+    HostRateLimiter,
+    parse_retry_after,
+)
+from page_archive import PageArchive, ReplayArchive
+from timetable_changes import (
+    diff_rows,
+    has_changes,
+    read_csv_rows,
+    render_csv,
+    sort_rows,
+    write_if_changed,
+)
+from timetable_extract import extract_timetable_json_fast, extract_timetable_json_soup
 
 # --- Constants ---
 BASE_URL = "https://my.uowdubai.ac.ae/timetable/viewer"
 DEFAULT_TIMEOUT = 45
 MAX_RETRIES = 5
 LINE_LENGTH_LIMIT = 99
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = SCRIPT_DIR / ".cache"
+DEFAULT_STATE_PATH = CACHE_DIR / "scrape_state.json"
+DEFAULT_SESSION_CACHE_PATH = CACHE_DIR / "session.json"
+SESSION_CACHE_TTL = 30 * 60  # Seconds, used when no cookie carries an expiry
+SESSION_EXPIRY_MARGIN = 60  # Treat sessions this close to expiry as expired
+DEFAULT_ROOM_CACHE_PATH = CACHE_DIR / "room_mapping.json"
+ROOM_MAPPING_TTL = 6 * 60 * 60  # Seconds before the cached room mapping is refreshed
+DEFAULT_MAX_WORKERS = 3
+
+# Exit codes: the cron workflow skips the later stages on EXIT_UNCHANGED
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_UNCHANGED = 3
 
 
 # --- Helper Function ---
@@ -41,26 +80,130 @@ def normalize_whitespace(text: Optional[str]) -> str:
     return " ".join(text.split())
 
 
-# --- Supabase Client Initialization ---
-try:
-    supabase = get_supabase_client()
-    print("Connected to Supabase (using Service Role Key - RLS bypassed).")
-except ValueError as exc:
-    print(f"Configuration Error: {exc}")
-    sys.exit("Exiting due to missing Supabase configuration.")
-except Exception as exc:  # Catch other potential init errors
-    print(f"Unexpected error initializing Supabase client: {exc}")
-    sys.exit("Exiting due to Supabase client initialization failure.")
+def hash_payload(payload: Any) -> str:
+    """
+    Returns a stable SHA-256 hex digest of a JSON-serializable payload.
+    Keys are sorted so that dict ordering does not affect the hash.
+    """
+    serialized = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+# --- Scrape State (conditional fetch validators + content hashes) ---
+def load_scrape_state(state_path: Path) -> Dict[str, Any]:
+    """Loads the scrape state file. Returns an empty state if missing or invalid."""
+    try:
+        with state_path.open("r", encoding="utf-8") as state_file:
+            state = json.load(state_file)
+        if isinstance(state, dict):
+            return state
+        print(f"Warning: Ignoring malformed scrape state in {state_path}.")
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as state_err:
+        print(f"Warning: Could not read scrape state {state_path}: {state_err}")
+    return {}
+
+
+def save_scrape_state(state_path: Path, state: Dict[str, Any]) -> None:
+    """Atomically writes the scrape state file (write to temp, then replace)."""
+    try:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as state_file:
+            json.dump(state, state_file, indent=2, sort_keys=True)
+        tmp_path.replace(state_path)
+    except OSError as state_err:
+        # Losing the state only costs one full run next time, never fail on it
+        print(f"Warning: Could not save scrape state {state_path}: {state_err}")
+
+
+# --- Session Cache (Cloudflare clearance cookies + the UA they are bound to) ---
+def load_session_cache(cache_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Loads a cached scraper session. Returns None if the cache is missing,
+    unreadable or expired.
+    """
+    try:
+        with cache_path.open("r", encoding="utf-8") as cache_file:
+            session = json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as cache_err:
+        print(f"Warning: Could not read session cache {cache_path}: {cache_err}")
+        return None
+
+    if not isinstance(session, dict) or not session.get("user_agent"):
+        print(f"Warning: Ignoring malformed session cache in {cache_path}.")
+        return None
+    if session.get("expires_at", 0) <= time.time() + SESSION_EXPIRY_MARGIN:
+        print("Cached scraper session has expired, starting a fresh one.")
+        return None
+    return session
+
+
+def save_session_cache(
+    cache_path: Path, scraper: cloudscraper.CloudScraper, user_agent: str
+) -> None:
+    """
+    Saves the scraper's cookies and user agent. The session expires with the
+    earliest-expiring cookie (normally cf_clearance), or after SESSION_CACHE_TTL.
+    """
+    cookies = [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires,
+            "secure": cookie.secure,
+        }
+        for cookie in scraper.cookies
+    ]
+    if not cookies:
+        return
+    cookie_expiries = [cookie["expires"] for cookie in cookies if cookie["expires"]]
+    expires_at = (
+        min(cookie_expiries) if cookie_expiries else time.time() + SESSION_CACHE_TTL
+    )
+    session = {"user_agent": user_agent, "expires_at": expires_at, "cookies": cookies}
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as cache_file:
+            json.dump(session, cache_file, indent=2)
+        os.chmod(tmp_path, 0o600)  # Clearance cookies are credentials
+        tmp_path.replace(cache_path)
+    except OSError as cache_err:
+        print(f"Warning: Could not save session cache {cache_path}: {cache_err}")
+
+
+def invalidate_session_cache(cache_path: Path) -> None:
+    """Deletes the cached session, e.g. after Cloudflare served a new challenge."""
+    try:
+        cache_path.unlink()
+        print(f"  Invalidated cached scraper session: {cache_path}")
+    except FileNotFoundError:
+        pass
+    except OSError as cache_err:
+        print(f"Warning: Could not delete session cache {cache_path}: {cache_err}")
 
 
 # --- Fetch Room Mapping (ShortCode -> Name) ---
-def fetch_room_mapping() -> Dict[str, str]:
-    """Fetches room ShortCode to Name mapping from Supabase"""
+def fetch_room_mapping() -> Optional[Dict[str, str]]:
+    """
+    Fetches room ShortCode to Name mapping from Supabase.
+    Returns None if Supabase is unreachable. Missing Supabase configuration
+    raises ValueError (see load_room_mapping).
+    """
     print("Fetching room mapping (ShortCode -> Name) from Supabase...")
     room_mapping: Dict[str, str] = {}
     try:
         response = (
-            supabase.table("Rooms")
+            get_shared_client()
+            .table("Rooms")
             .select("Name, ShortCode")
             .neq("Name", "%Consultation%")
             .neq("Name", "%Online%")
@@ -99,27 +242,220 @@ def fetch_room_mapping() -> Dict[str, str]:
     except APIError as api_exc:
         print(f"Supabase API Error fetching room mapping: {api_exc}")
         print(f"  Details: {getattr(api_exc, 'details', 'N/A')}")
-        return {}
+        return None
     except RequestError as req_exc:
         print(f"Network Error fetching room mapping: {req_exc}")
-        return {}
+        return None
+    except ValueError:  # Missing configuration is not a transient fetch error
+        raise
     except Exception as gen_exc:  # Catch other unexpected errors during fetch
         print(f"Unexpected error fetching room mapping: {gen_exc}")
         traceback.print_exc()
-        return {}
+        return None
 
 
-# Global room mapping fetched once (Normalized ShortCode -> Normalized Name), sorted
-ROOM_MAPPING: Dict[str, str] = fetch_room_mapping()
-# --- End Mapping Fetch ---
+def load_room_mapping_cache(cache_path: Path) -> Tuple[Optional[Dict[str, str]], float]:
+    """
+    Reads the cached room mapping. Returns (mapping, fetched_at timestamp), or
+    (None, 0.0) if there is no usable cache.
+    """
+    try:
+        with cache_path.open("r", encoding="utf-8") as cache_file:
+            cached = json.load(cache_file)
+        mapping = cached.get("mapping")
+        if isinstance(mapping, dict):
+            return mapping, float(cached.get("fetched_at", 0.0))
+        print(f"Warning: Ignoring malformed room mapping cache in {cache_path}.")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, AttributeError) as cache_err:
+        print(f"Warning: Could not read room mapping cache {cache_path}: {cache_err}")
+    return None, 0.0
+
+
+def save_room_mapping_cache(cache_path: Path, room_mapping: Dict[str, str]) -> None:
+    """Writes the room mapping (in its sorted order) with a fetch timestamp."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as cache_file:
+            json.dump({"fetched_at": time.time(), "mapping": room_mapping}, cache_file)
+        tmp_path.replace(cache_path)
+    except OSError as cache_err:
+        print(f"Warning: Could not save room mapping cache {cache_path}: {cache_err}")
+
+
+def load_room_mapping(
+    cache_path: Optional[Path] = DEFAULT_ROOM_CACHE_PATH,
+    ttl: float = ROOM_MAPPING_TTL,
+    refresh: bool = False,
+    offline: bool = False,
+) -> Tuple[Dict[str, str], bool]:
+    """
+    Returns (room mapping, degraded). The mapping comes from the local cache while it is younger than ttl,
+    otherwise refetches it from Supabase. If the fetch fails (or returns no rooms)
+    the cached mapping is served however old it is (stale-if-error); without one
+    the run cannot map rooms, so missing configuration re-raises its ValueError
+    and any other failure raises RuntimeError.
+    With offline=True Supabase is never contacted and any cached mapping is used;
+    only then is an empty mapping returned when there is no cache.
+    degraded is True when the mapping may not match Supabase: a stale mapping
+    served after an error, or an empty one offline.
+    """
+    cached, fetched_at = (None, 0.0)
+    if cache_path:
+        cached, fetched_at = load_room_mapping_cache(cache_path)
+    age = time.time() - fetched_at
+
+    if offline:
+        if cached is None:
+            print("Warning: Offline and no cached room mapping; rooms stay unmapped.")
+            return {}, True
+        print(f"Using cached room mapping offline: {len(cached)} entries.")
+        return cached, False
+
+    if cached is not None and not refresh and age < ttl:
+        print(
+            f"Using cached room mapping: {len(cached)} entries "
+            f"(age {age / 60:.0f} min)."
+        )
+        return cached, False
+
+    try:
+        fresh = fetch_room_mapping()
+    except ValueError as config_exc:
+        if cached is None:
+            raise
+        print(f"Configuration Error: {config_exc}")
+        fresh = None
+    if fresh:
+        if cache_path:
+            save_room_mapping_cache(cache_path, fresh)
+        return fresh, False
+    if cached is not None:
+        print(
+            f"Warning: Using stale cached room mapping ({len(cached)} entries, "
+            f"age {age / 3600:.1f} h) since a fresh one could not be fetched."
+        )
+        return cached, True
+    raise RuntimeError(
+        "Fatal: Could not fetch the room mapping from Supabase and no cached "
+        "mapping exists."
+    )
+
+
+class RoomPrefixIndex:
+    """
+    Longest-prefix-match index over normalized room ShortCodes.
+
+    ShortCodes are bucketed by length, so resolving a location costs one dict lookup
+    per distinct ShortCode length instead of a startswith() over every room. Resolved
+    locations are memoized since the same rooms repeat thousands of times per scrape.
+    """
+
+    def __init__(self, room_mapping: Dict[str, str]):
+        self.room_mapping = room_mapping
+        # Longest first, so the first hit is the most specific prefix
+        self.prefix_lengths = sorted({len(code) for code in room_mapping}, reverse=True)
+        self.memo: Dict[str, str] = {}
+        self.applied: Counter = Counter()  # (location, room name) -> references
+
+    def longest_prefix_match(self, location: str) -> Optional[str]:
+        """Return the room name of the longest ShortCode prefixing location, if any."""
+        location_length = len(location)
+        for length in self.prefix_lengths:
+            if length <= location_length:
+                full_name = self.room_mapping.get(location[:length])
+                if full_name is not None:
+                    return full_name
+        return None
+
+    def resolve(self, location: str) -> str:
+        """Return the mapped room name for a normalized location (memoized)."""
+        final_room_name = self.memo.get(location)
+        if final_room_name is None:
+            final_room_name = self.longest_prefix_match(location) or location
+            self.memo[location] = final_room_name
+        if final_room_name != location:
+            self.applied[(location, final_room_name)] += 1
+        return final_room_name
+
+    def print_summary(self) -> None:
+        """Print one line per distinct mapping applied, instead of one per row."""
+        if not self.applied:
+            print("  No room mappings applied.")
+            return
+        print(
+            f"  Room mapping applied to {sum(self.applied.values())} location "
+            f"references ({len(self.applied)} distinct locations):"
+        )
+        for (location, room_name), count in sorted(self.applied.items()):
+            print(f"    '{location}' -> '{room_name}' (x{count})")
+
+
+def semester_slug(label: str) -> str:
+    """Turn a semester label like 'Autumn 2025' into a file-name slug 'autumn-2025'."""
+    return re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-") or "semester"
 
 
 class TimetableScraper:
     """Scrapes timetable data from UOW Dubai website."""
 
-    def __init__(self):
-        """Initialize scraper with cloudscraper instance and headers."""
+    def __init__(
+        self,
+        state_path: Optional[Path] = None,
+        fast_extract: bool = True,
+        policy: Optional[FetchPolicy] = None,
+        session_cache_path: Optional[Path] = None,
+        room_cache_path: Optional[Path] = DEFAULT_ROOM_CACHE_PATH,
+        room_cache_ttl: float = ROOM_MAPPING_TTL,
+        archive: Optional[PageArchive] = None,
+        replay: Optional[ReplayArchive] = None,
+    ):
+        """
+        Initialize scraper with cloudscraper instance and headers.
+        If state_path is given, ETag/Last-Modified validators and content hashes
+        from previous runs are loaded from it and used to skip unchanged work.
+        fast_extract selects the DOM-free timetableData extractor.
+        policy controls request pacing and retry backoff (see fetch_policy.py).
+        If session_cache_path is given, cookies (including Cloudflare clearance)
+        and their user agent are restored from it and saved back after the run.
+        The room mapping is loaded on first use from room_cache_path (refreshed
+        from Supabase once older than room_cache_ttl seconds).
+        If archive is given, every fetched page is saved to it. If replay is
+        given, pages (and the room mapping) come from that archived run and no
+        network request is made.
+        The rows written for each output CSV stay available in rows_by_output, so
+        in-process callers (see pipeline.py) need not read the CSVs back.
+        """
         self.scraper = self.create_scraper()
+        # Semester workers share the session; the lock keeps a reset from swapping
+        # scraper and UA under a request (each request snapshots both, see fetch_page)
+        self.session_lock = threading.Lock()
+        self.session_cache_path = session_cache_path
+        # Clearance cookies are bound to the UA that solved the challenge, so the
+        # UA is fixed per session instead of being randomized on every attempt
+        self.user_agent = self.random_user_agent()
+        if session_cache_path:
+            self.restore_session(session_cache_path)
+        self.fast_extract = fast_extract
+        self.policy = policy or FetchPolicy()
+        self.room_cache_path = room_cache_path
+        self.room_cache_ttl = room_cache_ttl
+        self.room_mapping: Optional[Dict[str, str]] = None
+        # Set when the mapping is stale or empty; outputs written with it are
+        # recorded as dirty so the next run rewrites them (see scrape_semester)
+        self.room_mapping_degraded = False
+        self.room_mapping_lock = threading.Lock()
+        self.archive = archive
+        self.replay = replay
+        self.rows_by_output: Dict[Path, List[Dict[str, str]]] = {}
+        if replay and replay.room_mapping is not None:
+            self.room_mapping = replay.room_mapping
+        self.state_path = state_path
+        self.state: Dict[str, Any] = (
+            load_scrape_state(state_path) if state_path else {}
+        )
         # self.semester_cache = {} # Consider removing if unused
         self.headers = {
             "Accept": (
@@ -128,10 +464,66 @@ class TimetableScraper:
             "Accept-Language": "en-US,en;q=0.5",
             "Referer": BASE_URL.split("/timetable", maxsplit=1)[0] + "/",
             "DNT": "1",
-            "User-Agent": self.random_user_agent(),
         }
         print("TimetableScraper initialized.")
 
+    def get_room_mapping(self) -> Dict[str, str]:
+        """Normalized ShortCode -> Name mapping, loaded once on first use."""
+        with self.room_mapping_lock:
+            if self.room_mapping is None:
+                self.room_mapping, self.room_mapping_degraded = load_room_mapping(
+                    self.room_cache_path,
+                    self.room_cache_ttl,
+                    offline=self.replay is not None,
+                )
+            return self.room_mapping
+
+    def restore_session(self, cache_path: Path) -> None:
+        """Load cached cookies and user agent into the scraper, if still valid."""
+        session = load_session_cache(cache_path)
+        if not session:
+            return
+        for cookie in session.get("cookies", []):
+            self.scraper.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+                expires=cookie.get("expires"),
+                secure=cookie.get("secure", False),
+            )
+        self.user_agent = session["user_agent"]
+        minutes_left = (session["expires_at"] - time.time()) / 60
+        print(
+            f"Reusing cached scraper session ({len(session.get('cookies', []))} "
+            f"cookies, expires in {minutes_left:.0f} min)."
+        )
+
+    def save_session(self) -> None:
+        """Persist the current cookies and user agent for the next run."""
+        if self.session_cache_path:
+            scraper, user_agent = self.current_session()
+            save_session_cache(self.session_cache_path, scraper, user_agent)
+
+    def current_session(self) -> Tuple[cloudscraper.CloudScraper, str]:
+        """Consistent (scraper, user agent) pair to use for one request."""
+        with self.session_lock:
+            return self.scraper, self.user_agent
+
+    def reset_session(self, challenged: Optional[cloudscraper.CloudScraper] = None) -> None:
+        """
+        Drop the current session after a challenge: new scraper, new UA. If the
+        challenged session was already replaced by another worker, the new one is
+        kept instead of being reset again.
+        """
+        with self.session_lock:
+            if challenged is not None and challenged is not self.scraper:
+                return
+            if self.session_cache_path:
+                invalidate_session_cache(self.session_cache_path)
+            self.scraper = self.create_scraper()
+            self.user_agent = self.random_user_agent()
+
     def create_scraper(self) -> cloudscraper.CloudScraper:
         """Create a new cloudscraper instance."""
         print("Creating CloudScraper instance...")
@@ -203,39 +595,111 @@ class TimetableScraper:
 
         return normalize_whitespace(semester_text)  # Normalize before returning
 
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from stored validators."""
+        validators = self.state.get("pages", {}).get(url, {})
+        headers: Dict[str, str] = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def remember_validators(
+        self, url: str, response: cloudscraper.requests.Response
+    ) -> None:
+        """
+        Store ETag/Last-Modified of a 200 response. Only called once the page
+        has been fully processed, so a failed run never leaves validators that
+        would make the next run skip it.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        pages = self.state.setdefault("pages", {})
+        if etag or last_modified:
+            pages[url] = {"etag": etag, "last_modified": last_modified}
+        else:
+            pages.pop(url, None)
+
     def fetch_page(
-        self, url: str, max_retries: int = MAX_RETRIES, timeout: int = DEFAULT_TIMEOUT
+        self,
+        url: str,
+        max_retries: int = MAX_RETRIES,
+        timeout: int = DEFAULT_TIMEOUT,
+        conditional: bool = False,
     ) -> cloudscraper.requests.Response:
-        """Fetch a page with retries and handling specific errors."""
+        """
+        Fetch a page with retries and handling specific errors.
+        With conditional=True, stored validators are sent and a 304 response
+        (status_code 304, empty body) is returned as-is to the caller. While an
+        archive is attached, requests are never conditional: a 304 has no body to
+        archive, and a run manifest missing a page could not be replayed.
+        """
+        if self.replay:
+            print(f"Replaying archived page: {url}")
+            return self.replay.load_page(url)
+
         print(f"Attempting to fetch: {url}")
         last_exception: Optional[Exception] = None  # Keep track of the last error
 
         for attempt in range(max_retries):
+            retry_after: Optional[float] = None
+            challenged = False
             try:
-                self.headers["User-Agent"] = self.random_user_agent()
-                ua_short = self.headers["User-Agent"][:30]
+                # Per-request copy, so concurrent fetches don't share header state
+                request_headers = dict(self.headers)
+                scraper, user_agent = self.current_session()
+                request_headers["User-Agent"] = user_agent
+                ua_short = request_headers["User-Agent"][:30]
                 print(f"  Attempt {attempt+1}/{max_retries} with UA: {ua_short}...")
 
-                response = self.scraper.get(url, headers=self.headers, timeout=timeout)
+                if conditional and not self.archive:
+                    request_headers.update(self.conditional_headers(url))
+                self.policy.before_request(url)
+                response = scraper.get(
+                    url, headers=request_headers, timeout=timeout
+                )
                 response.raise_for_status()
 
-                print(f"  Successfully fetched {url} (Status: {response.status_code})")
-                time.sleep(random.uniform(1, 4))
+                if response.status_code == 304:
+                    print(f"  Not modified since last run: {url} (Status: 304)")
+                else:
+                    print(
+                        f"  Successfully fetched {url} "
+                        f"(Status: {response.status_code})"
+                    )
+                    if self.archive:
+                        self.archive.store_page(url, response)
                 return response
 
             # Specific error handling
             except cloudscraper.exceptions.CloudflareChallengeError as cf_exc:
                 print(f"  Attempt {attempt+1} failed: Cloudflare challenge. {cf_exc}")
                 print("  Recreating scraper and waiting longer...")
-                self.scraper = self.create_scraper()
-                wait_time = random.uniform(10, 25)
-                time.sleep(wait_time)
+                self.reset_session(scraper)
+                challenged = True
                 last_exception = cf_exc
+            except cloudscraper.requests.exceptions.HTTPError as http_err:
+                # raise_for_status() raises requests' HTTPError, not httpx's
+                error_response = http_err.response
+                status_code = getattr(error_response, "status_code", "unknown")
+                print(
+                    f"  Attempt {attempt+1} failed: HTTP Error "
+                    f"{status_code} for url {url}. {http_err}"
+                )
+                if error_response is not None:
+                    retry_after = parse_retry_after(
+                        error_response.headers.get("Retry-After")
+                    )
+                last_exception = http_err
             except HTTPStatusError as http_err:
                 print(
                     f"  Attempt {attempt+1} failed: HTTP Error "
                     f"{http_err.response.status_code} for url {url}. {http_err}"
                 )
+                retry_after = parse_retry_after(
+                    http_err.response.headers.get("Retry-After")
+                )
                 last_exception = http_err
             except TimeoutException as timeout_err:
                 print(f"  Attempt {attempt+1} failed: Request timed out. {timeout_err}")
@@ -250,9 +714,9 @@ class TimetableScraper:
 
             # Wait before retrying if it wasn't the last attempt
             if attempt < max_retries - 1:
-                wait_time = random.uniform(5, 15) * (attempt + 1)
-                print(f"  Waiting {wait_time:.2f} seconds before retrying...")
-                time.sleep(wait_time)
+                self.policy.wait_before_retry(
+                    attempt, retry_after=retry_after, challenge=challenged
+                )
             else:
                 print(f"  Max retries reached for {url}. Raising last error.")
                 # Raise the last exception encountered if all retries fail
@@ -301,13 +765,18 @@ class TimetableScraper:
             traceback.print_exc()
             return {}
 
-    def get_target_semester_id(self, base_page_html: str) -> Optional[str]:
+    def get_target_semester_id(
+        self,
+        base_page_html: str,
+        available_semesters: Optional[Dict[str, str]] = None,
+    ) -> Optional[str]:
         """Find the semester ID that matches the current target semester."""
         print("Determining target semester ID...")
         # Ensure target text is also normalized for comparison
         target_semester_text = self.get_current_semester_text()
         print(f"  Target semester text (normalized): '{target_semester_text}'")
-        available_semesters = self.extract_semester_ids(base_page_html)
+        if available_semesters is None:
+            available_semesters = self.extract_semester_ids(base_page_html)
 
         if not available_semesters:
             print("Error: No semesters found on the page.")
@@ -350,52 +819,34 @@ class TimetableScraper:
             return None
 
     def extract_timetable_data(self, timetable_page_html: str) -> Optional[List[Dict]]:
-        """Extract timetable data JSON embedded in the page's script tags."""
+        """
+        Extract timetable data JSON embedded in the page's script tags.
+        Uses the DOM-free scanner first and only falls back to a full
+        BeautifulSoup parse if that fails (or if fast extraction is disabled).
+        """
         print("Extracting timetable data from HTML script...")
-        try:
-            soup = BeautifulSoup(timetable_page_html, "html.parser")
-            scripts: List[Tag] = soup.find_all("script")
-
-            for script in scripts:
-                if script.string and "timetableData" in script.string:
-                    regex = r"timetableData\s*=\s*(\[.*\])\s*;"
-                    match = re.search(regex, script.string, re.DOTALL | re.MULTILINE)
-                    if match:
-                        json_str = match.group(1)
-                        try:
-                            timetable_data: List[Dict] = json.loads(json_str)
-                            count = len(timetable_data)
-                            print(
-                                f"  Successfully extracted timetableData JSON "
-                                f"({count} entries)."
-                            )
-                            return timetable_data
-                        except json.JSONDecodeError as json_err:
-                            print(f"Error decoding timetableData JSON: {json_err}")
-                            return None
-                    else:
-                        print(
-                            "  Found script with 'timetableData' but regex "
-                            "didn't match expected structure."
-                        )
-
-            print("Error: Could not find 'timetableData' variable in any script tag.")
-            return None
-        except Exception as exc:
-            print(f"Error parsing HTML for timetable data: {exc}")
-            traceback.print_exc()
-            return None
+        timetable_data: Optional[List[Dict]] = None
+        if self.fast_extract:
+            timetable_data = extract_timetable_json_fast(timetable_page_html)
+            if timetable_data is None:
+                print("  Fast extraction failed, falling back to BeautifulSoup...")
 
-    def process_data_to_csv(
-        self, raw_data: List[Dict[str, Any]], output_path: Path
-    ) -> None:
-        # pylint: disable=too-many-nested-blocks
-        """Process raw data and write to CSV, using prefix mapping as fallback."""
-        print(
-            f"Processing {len(raw_data)} raw entries and writing to CSV: "
-            f"{output_path}..."
-        )
-        processed_count = 0
+        if timetable_data is None:
+            timetable_data = extract_timetable_json_soup(timetable_page_html)
+
+        if timetable_data is not None:
+            print(
+                f"  Successfully extracted timetableData JSON "
+                f"({len(timetable_data)} entries)."
+            )
+        return timetable_data
+
+    def build_csv_rows(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Turn raw timetableData entries into CSV rows (one per location x teacher),
+        using prefix mapping for room names. Rows are returned in canonical order.
+        """
+        rows: List[Dict[str, str]] = []
         required_fields = [
             "subject_code",
             "location",
@@ -403,96 +854,86 @@ class TimetableScraper:
             "start_time",
             "end_time",
         ]
+        room_index = RoomPrefixIndex(self.get_room_mapping())
+
+        for entry in raw_data:
+            if not all(entry.get(field) for field in required_fields):
+                continue
+
+            # Normalize locations immediately after splitting and stripping
+            raw_locations = entry.get("location", "").split(";")
+            locations = [
+                normalize_whitespace(loc) for loc in raw_locations if loc.strip()
+            ] or ["Unknown"]  # Ensure Unknown is also normalized if used
+
+            # Normalize teachers immediately
+            raw_lecturers = entry.get("lecturer", "").split(";")
+            teachers = [
+                normalize_whitespace(t) for t in raw_lecturers if t.strip()
+            ] or [normalize_whitespace("Unknown")]
+
+            # Normalize the remaining text fields once per entry
+            subcode = entry.get("subject_code", "").replace(" ", "")
+            class_type = normalize_whitespace(entry.get("type_with_section", ""))
+            day = normalize_whitespace(entry.get("week_day", ""))
+            start_time_str = normalize_whitespace(entry.get("start_time", ""))
+            end_time_str = normalize_whitespace(entry.get("end_time", ""))
+
+            # Iterate through normalized locations
+            for loc_full_norm in locations:
+                # Room Name Logic (longest ShortCode prefix on normalized values)
+                final_room_name = room_index.resolve(loc_full_norm)
+
+                # Use normalized teacher names
+                for teacher_norm in teachers:
+                    rows.append(
+                        {
+                            "SubCode": subcode,
+                            "Class": class_type,
+                            "Day": day,
+                            "StartTime": start_time_str,
+                            "EndTime": end_time_str,
+                            "Room": final_room_name,  # Already normalized/mapped
+                            "Teacher": teacher_norm,  # Already normalized
+                        }
+                    )
+
+        room_index.print_summary()
+        return sort_rows(rows)
 
-        try:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with output_path.open("w", newline="", encoding="utf-8") as csvfile:
-                fieldnames = [
-                    "SubCode",
-                    "Class",
-                    "Day",
-                    "StartTime",
-                    "EndTime",
-                    "Room",
-                    "Teacher",
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-
-                for entry in raw_data:
-                    if not all(entry.get(field) for field in required_fields):
-                        continue
-
-                    # Normalize locations immediately after splitting and stripping
-                    raw_locations = entry.get("location", "").split(";")
-                    locations = [
-                        normalize_whitespace(loc)
-                        for loc in raw_locations
-                        if loc.strip()
-                    ] or [
-                        "Unknown"
-                    ]  # Ensure Unknown is also normalized if used
-
-                    # Normalize teachers immediately
-                    raw_lecturers = entry.get("lecturer", "").split(";")
-                    teachers = [
-                        normalize_whitespace(t) for t in raw_lecturers if t.strip()
-                    ] or [normalize_whitespace("Unknown")]
-
-                    # Iterate through normalized locations
-                    for loc_full_norm in locations:
-
-                        # --- Room Name Logic (Prefix Matching on Normalized) ---
-                        final_room_name = loc_full_norm  # Default
-
-                        # Check against normalized mapping keys/values
-                        for short_code_norm, full_name_norm in ROOM_MAPPING.items():
-                            if loc_full_norm.startswith(short_code_norm):
-                                if loc_full_norm != full_name_norm:
-                                    print(
-                                        f"  Mapping Applied: Scraped/Norm "
-                                        f"'{loc_full_norm}' starts with Norm "
-                                        f"SC '{short_code_norm}'. Using Norm "
-                                        f"FN '{full_name_norm}'."
-                                    )
-                                    final_room_name = full_name_norm
-                                # Found most specific prefix match, stop checking
-                                break
-                        # --- End Room Name Logic ---
-
-                        # Use normalized teacher names
-                        for teacher_norm in teachers:
-                            # Normalize other text fields just before writing
-                            subcode = entry.get("subject_code", "").replace(" ", "")
-                            class_type = normalize_whitespace(
-                                entry.get("type_with_section", "")
-                            )
-                            day = normalize_whitespace(entry.get("week_day", ""))
-                            start_time_str = normalize_whitespace(
-                                entry.get("start_time", "")
-                            )
-                            end_time_str = normalize_whitespace(
-                                entry.get("end_time", "")
-                            )
-
-                            row_data = {
-                                "SubCode": subcode,
-                                "Class": class_type,
-                                "Day": day,
-                                "StartTime": start_time_str,
-                                "EndTime": end_time_str,
-                                "Room": final_room_name,  # Already normalized/mapped
-                                "Teacher": teacher_norm,  # Already normalized
-                            }
-                            writer.writerow(row_data)
-                            processed_count += 1
+    def process_data_to_csv(
+        self, raw_data: List[Dict[str, Any]], output_path: Path
+    ) -> Dict[str, Any]:
+        """
+        Process raw data into canonically sorted rows, diff them against the
+        previous CSV. The CSV itself is only rewritten when its content changed.
+        Returns the changeset.
+        """
+        print(
+            f"Processing {len(raw_data)} raw entries and writing to CSV: "
+            f"{output_path}..."
+        )
 
+        try:
+            rows = self.build_csv_rows(raw_data)
+            self.rows_by_output[output_path] = rows
+            changeset = diff_rows(read_csv_rows(output_path), rows)
+            counts = changeset["counts"]
             print(
-                f"Successfully processed and wrote {processed_count} rows to "
-                f"{output_path.resolve()}"
+                f"  Changes vs previous CSV: {counts['added']} added, "
+                f"{counts['removed']} removed, {counts['modified']} modified, "
+                f"{counts['unchanged']} unchanged."
             )
 
+            if write_if_changed(output_path, render_csv(rows)):
+                print(
+                    f"Successfully processed and wrote {len(rows)} rows to "
+                    f"{output_path.resolve()}"
+                )
+            else:
+                print(f"CSV content unchanged, left {output_path.resolve()} as is.")
+            return changeset
+
         except (IOError, OSError) as file_err:
             print(f"Error writing CSV file '{output_path}': {file_err}")
             raise
@@ -504,40 +945,136 @@ class TimetableScraper:
             traceback.print_exc()
             raise
 
-    def scrape(self, output_csv_path: Path) -> bool:
-        """Main scraping orchestration logic."""
-        print("Starting timetable scraping process...")
-        start_time = time.time()
+    def resolve_semester_id(self, force: bool) -> Optional[str]:
+        """
+        Fetch the base page and determine the target semester ID. If the base
+        page is unchanged and the target semester text matches the one stored
+        in the state, the stored semester ID (and semester list) is reused.
+        """
+        target_text = self.get_current_semester_text()
+        cached_id = self.state.get("semester_id")
+        can_reuse = (
+            not force
+            and cached_id
+            and self.state.get("semester_text") == target_text
+            and self.state.get("semesters")
+        )
 
-        try:
-            print("\n--- Step 1: Fetching Base Page ---")
-            base_response = self.fetch_page(BASE_URL)
+        base_response = self.fetch_page(BASE_URL, conditional=bool(can_reuse))
+        if base_response.status_code == 304:
+            print(f"  Base page unchanged, reusing semester ID: {cached_id}")
+            return cached_id
 
-            print("\n--- Step 2: Determining Semester ID ---")
-            semester_id = self.get_target_semester_id(base_response.text)
-            if not semester_id:
-                raise RuntimeError(
-                    "Fatal: Could not determine target " "semester ID. Exiting."
+        available_semesters = self.extract_semester_ids(base_response.text)
+        if self.replay and self.replay.semester_id in available_semesters.values():
+            # The date heuristic may pick another term than the archived run did
+            semester_id = self.replay.semester_id
+            print(f"  Using semester ID recorded in the archived run: {semester_id}")
+        else:
+            semester_id = self.get_target_semester_id(
+                base_response.text, available_semesters
+            )
+        if semester_id:
+            self.state["semester_id"] = semester_id
+            self.state["semester_text"] = target_text
+            self.state["semesters"] = available_semesters
+            self.remember_validators(BASE_URL, base_response)
+        return semester_id
+
+    def select_semesters(
+        self, requested: List[str], target_id: str
+    ) -> Dict[str, str]:
+        """
+        Resolve requested semester labels or IDs (["*"] means all) against the
+        semesters on the base page. Returns {semester_id: label}, excluding the
+        target semester, which is always scraped separately.
+        """
+        available = self.state.get("semesters", {})
+        selected: Dict[str, str] = {}
+        if requested == ["*"]:
+            selected = {sid: label for label, sid in available.items()}
+        else:
+            for wanted in requested:
+                wanted_norm = normalize_whitespace(wanted).lower()
+                match = next(
+                    (
+                        (sid, label)
+                        for label, sid in available.items()
+                        if wanted_norm in (label.lower(), sid.lower())
+                    ),
+                    None,
+                ) or next(
+                    (
+                        (sid, label)
+                        for label, sid in available.items()
+                        if wanted_norm in label.lower()
+                    ),
+                    None,
                 )
+                if match:
+                    selected[match[0]] = match[1]
+                else:
+                    print(f"  Warning: Requested semester '{wanted}' not found.")
+        selected.pop(target_id, None)
+        return selected
+
+    def scrape_semester(
+        self, semester_id: str, output_csv_path: Path, force: bool
+    ) -> int:
+        """
+        Fetch, extract and write one semester's timetable to output_csv_path.
+        Returns EXIT_SUCCESS, EXIT_UNCHANGED or EXIT_FAILURE (errors are logged).
+        """
+        output_key = str(output_csv_path)
+        previous = self.state.get("outputs", {}).get(output_key, {})
+        rooms_hash = hash_payload(self.get_room_mapping())
+        # Previous results can only be trusted if the CSV they produced still exists
+        can_skip = (
+            not force
+            and output_csv_path.is_file()
+            and previous.get("rooms_hash") == rooms_hash
+            and previous.get("semester_id") == semester_id
+        )
 
-            print("\n--- Step 3: Fetching Timetable Page ---")
+        try:
+            print(f"\n--- Fetching Timetable Page (semester {semester_id}) ---")
             target_url = f"{BASE_URL}?semester={semester_id}"
-            final_response = self.fetch_page(target_url)
+            final_response = self.fetch_page(target_url, conditional=can_skip)
+
+            if final_response.status_code == 304:
+                print(f"  Semester {semester_id} unchanged: {output_csv_path.name}")
+                return EXIT_UNCHANGED
 
-            print("\n--- Step 4: Extracting Timetable Data ---")
+            print(f"\n--- Extracting Timetable Data (semester {semester_id}) ---")
             timetable_data = self.extract_timetable_data(final_response.text)
             if not timetable_data:
                 raise RuntimeError(
-                    "Fatal: Failed to extract timetable data " "from the page. Exiting."
+                    "Fatal: Failed to extract timetable data "
+                    f"for semester {semester_id}."
                 )
 
-            print("\n--- Step 5: Processing Data and Saving to CSV ---")
-            self.process_data_to_csv(timetable_data, output_csv_path)
-
-            end_time = time.time()
-            duration = end_time - start_time
-            print(f"\nScraping completed successfully in {duration:.2f} seconds.")
-            return True
+            payload_hash = hash_payload(timetable_data)
+            if can_skip and previous.get("payload_hash") == payload_hash:
+                print(
+                    f"  timetableData payload hash for semester {semester_id} "
+                    "matches previous run."
+                )
+                self.remember_validators(target_url, final_response)
+                return EXIT_UNCHANGED
+
+            print(f"\n--- Processing Data and Saving to CSV (semester {semester_id}) ---")
+            changeset = self.process_data_to_csv(timetable_data, output_csv_path)
+
+            # A degraded mapping leaves the rooms hash unset, so the next run can
+            # neither get a 304 nor match the payload hash and rewrites the CSV
+            self.state.setdefault("outputs", {})[output_key] = {
+                "semester_id": semester_id,
+                "payload_hash": payload_hash,
+                "rooms_hash": None if self.room_mapping_degraded else rooms_hash,
+            }
+            self.remember_validators(target_url, final_response)
+            # A new payload can still produce identical rows (e.g. reordering)
+            return EXIT_SUCCESS if has_changes(changeset) else EXIT_UNCHANGED
 
         # Catch specific known errors first
         except (
@@ -551,22 +1088,124 @@ class TimetableScraper:
             cloudscraper.exceptions.CloudflareChallengeError,
             json.JSONDecodeError,
         ) as known_err:
-            end_time = time.time()
-            duration = end_time - start_time
+            print(
+                f"\nSemester {semester_id} failed: "
+                f"{type(known_err).__name__} - {known_err}"
+            )
+            return EXIT_FAILURE
+        except Exception as unknown_err:  # Catch truly unexpected errors
+            print(
+                f"\nSemester {semester_id} failed unexpectedly: "
+                f"{type(unknown_err).__name__} - {unknown_err}"
+            )
+            traceback.print_exc()
+            return EXIT_FAILURE
+
+    def scrape(
+        self,
+        output_csv_path: Path,
+        force: bool = False,
+        extra_semesters: Optional[List[str]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> int:
+        """
+        Main scraping orchestration logic.
+
+        The current (date-based) semester is written to output_csv_path. Any
+        extra_semesters (labels or IDs, ["*"] for all) are written next to it as
+        '<stem>.<semester-slug><suffix>'. Semester pages are fetched concurrently
+        by up to max_workers threads, paced per host by the fetch policy.
+
+        Returns EXIT_SUCCESS when at least one CSV was rewritten, EXIT_UNCHANGED
+        when every timetable (and the room mapping) is identical to the previous
+        run, and EXIT_FAILURE if anything failed.
+        """
+        print("Starting timetable scraping process...")
+        start_time = time.time()
+
+        try:
+            print("\n--- Fetching Base Page and Determining Semester ID ---")
+            semester_id = self.resolve_semester_id(force)
+            if not semester_id:
+                raise RuntimeError(
+                    "Fatal: Could not determine target " "semester ID. Exiting."
+                )
+            # Loaded up front so a missing mapping fails the run once instead of
+            # every semester writing unmapped room codes
+            self.get_room_mapping()
+        except (
+            ValueError,
+            RuntimeError,
+            RequestError,
+            HTTPStatusError,
+            TimeoutException,
+            cloudscraper.exceptions.CloudflareChallengeError,
+        ) as known_err:
+            duration = time.time() - start_time
             print(
                 f"\nScraping failed after {duration:.2f} seconds: "
                 f"{type(known_err).__name__} - {known_err}"
             )
-            return False
+            return EXIT_FAILURE
         except Exception as unknown_err:  # Catch truly unexpected errors
-            end_time = time.time()
-            duration = end_time - start_time
+            duration = time.time() - start_time
             print(
                 f"\nScraping failed unexpectedly after {duration:.2f} seconds: "
                 f"{type(unknown_err).__name__} - {unknown_err}"
             )
             traceback.print_exc()
-            return False
+            return EXIT_FAILURE
+
+        jobs: List[Tuple[str, Path]] = [(semester_id, output_csv_path)]
+        if extra_semesters:
+            for extra_id, label in self.select_semesters(
+                extra_semesters, semester_id
+            ).items():
+                extra_path = output_csv_path.with_name(
+                    f"{output_csv_path.stem}.{semester_slug(label)}"
+                    f"{output_csv_path.suffix}"
+                )
+                print(f"  Also scraping '{label}' (ID: {extra_id}) -> {extra_path}")
+                jobs.append((extra_id, extra_path))
+
+        worker_count = max(1, min(max_workers, len(jobs)))
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            statuses = list(
+                executor.map(
+                    lambda job: self.scrape_semester(job[0], job[1], force), jobs
+                )
+            )
+
+        if self.state_path:
+            save_scrape_state(self.state_path, self.state)
+        if self.room_mapping_degraded:
+            print(
+                "Warning: CSVs written this run used a stale or empty room mapping; "
+                "they are marked dirty and will be rewritten on the next run."
+            )
+        self.save_session()
+        if self.archive:
+            self.archive.record(
+                semester_id=semester_id, room_mapping=self.room_mapping
+            )
+            self.archive.save_run()
+
+        duration = time.time() - start_time
+        if EXIT_FAILURE in statuses:
+            failed = statuses.count(EXIT_FAILURE)
+            print(
+                f"\nScraping failed for {failed}/{len(jobs)} semester(s) "
+                f"after {duration:.2f} seconds."
+            )
+            return EXIT_FAILURE
+        if all(status == EXIT_UNCHANGED for status in statuses):
+            print(
+                f"\nTimetable unchanged since last run; CSV left untouched "
+                f"({duration:.2f} seconds)."
+            )
+            return EXIT_UNCHANGED
+        print(f"\nScraping completed successfully in {duration:.2f} seconds.")
+        return EXIT_SUCCESS
 
 
 def main():
@@ -580,14 +1219,187 @@ def main():
         help="Output CSV file path (e.g., ./public/classes.csv)",
         type=Path,
     )
+    parser.add_argument(
+        "--state-file",
+        default=DEFAULT_STATE_PATH,
+        help=(
+            "Scrape state file holding ETag/Last-Modified validators and content "
+            f"hashes (default: {DEFAULT_STATE_PATH})"
+        ),
+        type=Path,
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the scrape state and always rewrite the CSV.",
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=["fast", "soup"],
+        default="fast",
+        help=(
+            "timetableData extraction strategy: 'fast' scans the raw HTML and "
+            "falls back to BeautifulSoup; 'soup' always parses the full page."
+        ),
+    )
+    parser.add_argument(
+        "--session-cache",
+        default=DEFAULT_SESSION_CACHE_PATH,
+        help=(
+            "File caching cookies (incl. Cloudflare clearance) and their user agent "
+            f"between runs (default: {DEFAULT_SESSION_CACHE_PATH})"
+        ),
+        type=Path,
+    )
+    parser.add_argument(
+        "--no-session-cache",
+        action="store_true",
+        help="Always start a fresh scraper session.",
+    )
+    parser.add_argument(
+        "--room-cache",
+        default=DEFAULT_ROOM_CACHE_PATH,
+        help=f"Local room mapping cache file (default: {DEFAULT_ROOM_CACHE_PATH})",
+        type=Path,
+    )
+    parser.add_argument(
+        "--room-cache-ttl",
+        type=float,
+        default=ROOM_MAPPING_TTL,
+        help=(
+            "Seconds before the cached room mapping is refetched from Supabase "
+            f"(default: {ROOM_MAPPING_TTL}; 0 always refetches)"
+        ),
+    )
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument(
+        "--archive-dir",
+        type=Path,
+        help=(
+            "Save every fetched page (gzip, content-addressed) plus a run "
+            "manifest into this directory. Conditional requests are turned "
+            "off, so every run's manifest holds all the pages it used."
+        ),
+    )
+    archive_group.add_argument(
+        "--replay",
+        type=Path,
+        metavar="ARCHIVE",
+        help=(
+            "Re-process an archived run (archive directory = latest run, or a "
+            "runs/<id>.json manifest) without any network access."
+        ),
+    )
+    semester_group = parser.add_mutually_exclusive_group()
+    semester_group.add_argument(
+        "--all-semesters",
+        action="store_true",
+        help="Also scrape every other semester offered on the viewer page.",
+    )
+    semester_group.add_argument(
+        "--semesters",
+        help=(
+            "Comma-separated semester labels or IDs to scrape in addition to the "
+            "current one (e.g. 'Winter 2026,Spring 2026'). Each is written to "
+            "'<output stem>.<semester-slug>.csv'."
+        ),
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Semester pages fetched concurrently (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Steady-state requests per second per host (default: {DEFAULT_RATE})",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=DEFAULT_BURST,
+        help=f"Requests allowed back-to-back before pacing (default: {DEFAULT_BURST})",
+    )
+    parser.add_argument(
+        "--backoff-base",
+        type=float,
+        default=DEFAULT_BACKOFF_BASE,
+        help=(
+            "Full-jitter backoff: retry n waits up to base * 2^n seconds "
+            f"(default: {DEFAULT_BACKOFF_BASE})"
+        ),
+    )
+    parser.add_argument(
+        "--backoff-cap",
+        type=float,
+        default=DEFAULT_BACKOFF_CAP,
+        help=f"Upper bound for a single retry wait (default: {DEFAULT_BACKOFF_CAP})",
+    )
+    parser.add_argument(
+        "--no-delay",
+        action="store_true",
+        help="Disable all pacing and backoff sleeps (local replays/testing only).",
+    )
     args = parser.parse_args()
     output_path = args.output.resolve()
     print(f"Output CSV will be saved to: {output_path}")
 
-    scraper = TimetableScraper()
-    success = scraper.scrape(output_path)
+    extra_semesters: Optional[List[str]] = None
+    if args.all_semesters:
+        extra_semesters = ["*"]
+    elif args.semesters:
+        extra_semesters = [
+            label for label in args.semesters.split(",") if label.strip()
+        ]
+
+    replay = ReplayArchive.open(args.replay.resolve()) if args.replay else None
+    if args.no_delay or replay:
+        policy = FetchPolicy.no_delay()
+    else:
+        policy = FetchPolicy(
+            limiter=HostRateLimiter(rate=args.rate, burst=args.burst),
+            backoff=BackoffPolicy(base=args.backoff_base, cap=args.backoff_cap),
+        )
+
+    if replay:
+        # Replays must not touch the live run's state or Cloudflare session
+        scraper = TimetableScraper(
+            fast_extract=args.extractor == "fast",
+            policy=policy,
+            room_cache_path=args.room_cache.resolve(),
+            replay=replay,
+        )
+        sys.exit(
+            scraper.scrape(
+                output_path,
+                force=True,
+                extra_semesters=extra_semesters,
+                max_workers=args.max_workers,
+            )
+        )
+
+    scraper = TimetableScraper(
+        state_path=args.state_file.resolve(),
+        fast_extract=args.extractor == "fast",
+        policy=policy,
+        session_cache_path=(
+            None if args.no_session_cache else args.session_cache.resolve()
+        ),
+        room_cache_path=args.room_cache.resolve(),
+        room_cache_ttl=args.room_cache_ttl,
+        archive=PageArchive(args.archive_dir.resolve()) if args.archive_dir else None,
+    )
+    status = scraper.scrape(
+        output_path,
+        force=args.force,
+        extra_semesters=extra_semesters,
+        max_workers=args.max_workers,
+    )
+    close_shared_client()
 
-    sys.exit(0 if success else 1)
+    sys.exit(status)
 
 
 if __name__ == "__main__":
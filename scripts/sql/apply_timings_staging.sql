@@ -0,0 +1,61 @@
+-- scripts/sql/apply_timings_staging.sql
+-- Applies one sync_timings.py run from "TimingsStaging" to "Timings" atomically.
+--
+-- sync_timings.py stages the diff (Op = 'delete' rows carry the Timings id in
+-- "TargetId", Op = 'insert' rows carry the new values) in chunks, then calls this
+-- function once. A PL/pgSQL function body runs in a single transaction, so readers
+-- of "Timings" see either the old or the new timetable, never a half-applied one.
+-- If "Timings" changed since the diff was computed (row counts don't match), the
+-- whole swap is rolled back.
+--
+-- Install once, e.g. via the Supabase SQL editor or `psql -f`.
+
+create or replace function apply_timings_staging(
+  p_run_id text,
+  p_expected_deletes integer,
+  p_expected_inserts integer
+)
+returns json
+language plpgsql
+as $$
+declare
+  v_deleted integer;
+  v_inserted integer;
+begin
+  delete from "Timings" t
+  using "TimingsStaging" s
+  where s."RunId" = p_run_id
+    and s."Op" = 'delete'
+    and t.id = s."TargetId";
+  get diagnostics v_deleted = row_count;
+
+  if v_deleted <> p_expected_deletes then
+    raise exception 'Timings changed during sync: expected % deletes, got %',
+      p_expected_deletes, v_deleted;
+  end if;
+
+  insert into "Timings" ("SubCode", "Class", "Day", "StartTime", "EndTime", "Room", "Teacher")
+  select "SubCode", "Class", "Day", "StartTime", "EndTime", "Room", "Teacher"
+  from "TimingsStaging"
+  where "RunId" = p_run_id
+    and "Op" = 'insert'
+  order by id;
+  get diagnostics v_inserted = row_count;
+
+  if v_inserted <> p_expected_inserts then
+    raise exception 'Staging incomplete: expected % inserts, got %',
+      p_expected_inserts, v_inserted;
+  end if;
+
+  delete from "TimingsStaging" where "RunId" = p_run_id;
+
+  return json_build_object('deleted', v_deleted, 'inserted', v_inserted);
+end;
+$$;
+
+-- PostgREST exposes every function in "public" as an RPC: only the service role
+-- (used by sync_timings.py) may apply staging to "Timings".
+revoke execute on function apply_timings_staging(text, integer, integer)
+  from public, anon, authenticated;
+grant execute on function apply_timings_staging(text, integer, integer)
+  to service_role;
@@ -0,0 +1,46 @@
+-- scripts/sql/upsert_teachers.sql
+-- Idempotent bulk insert of new teachers, keyed on the normalised name.
+--
+-- teacher_name_key() is a coarser form of normalize_name() in scripts/name_index.py
+-- (trimmed, inner whitespace collapsed, lower-cased): update_teachers.py already
+-- drops names whose normalize_name() key exists, and the unique index on
+-- teacher_name_key() is the database-side safety net. It makes
+-- upsert_teachers() safe to retry: names that already exist (from an earlier,
+-- partially applied chunk, or a concurrent run) are skipped, never duplicated.
+--
+-- Install once, e.g. via the Supabase SQL editor or `psql -f`. Creating the index
+-- fails if the table already holds near-duplicate names; merge those first.
+
+create or replace function teacher_name_key(p_name text)
+returns text
+language sql
+immutable
+as $$
+  select lower(regexp_replace(btrim(p_name), '\s+', ' ', 'g'));
+$$;
+
+create unique index if not exists "Teacher_name_key_idx"
+  on "Teacher" (teacher_name_key("Name"));
+
+create or replace function upsert_teachers(p_names text[])
+returns integer
+language plpgsql
+as $$
+declare
+  v_inserted integer;
+begin
+  insert into "Teacher" ("Name", "Email", "Phone")
+  select name, '', ''
+  from unnest(p_names) as name
+  on conflict (teacher_name_key("Name")) do nothing;
+  get diagnostics v_inserted = row_count;
+  return v_inserted;
+end;
+$$;
+
+-- PostgREST exposes every function in "public" as an RPC: only the service role
+-- (used by update_teachers.py) may insert into "Teacher".
+revoke execute on function upsert_teachers(text[])
+  from public, anon, authenticated;
+grant execute on function upsert_teachers(text[])
+  to service_role;
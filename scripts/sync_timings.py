@@ -0,0 +1,239 @@
+# \scripts\sync_timings.py
+# pylint: disable=broad-except
+"""
+Syncs the scraped timetable CSV into the `Timings` table.
+
+Instead of rewriting the whole table, the CSV rows are diffed against the current
+`Timings` contents (as a multiset: exact duplicate rows are kept) and only the
+difference is written:
+  1. the delete ids and insert rows are staged in "TimingsStaging" in chunks
+  2. the apply_timings_staging() SQL function (scripts/sql/) applies them in a
+     single transaction, so readers never see a half-synced timetable
+
+Usage:
+  python sync_timings.py [--csv ../public/classes.csv] [--chunk-size 500] [--dry-run]
+"""
+
+import argparse
+import datetime
+import sys
+import traceback
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, DefaultDict
+
+# Third-party imports
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from httpx import RequestError, HTTPStatusError
+
+# Local imports
+from db_connection import close_shared_client, get_shared_client
+from keyset_pagination import fetch_rows_by_id
+from timetable_changes import CSV_FIELDNAMES, normalize_time, read_csv_rows
+
+# --- Configuration ---
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_CSV_PATH = SCRIPT_DIR.parent / "public" / "classes.csv"
+TIMINGS_TABLE = "Timings"
+STAGING_TABLE = "TimingsStaging"
+APPLY_FUNCTION = "apply_timings_staging"
+DEFAULT_CHUNK_SIZE = 500  # Rows per staging insert request
+
+# A row without these is not a timing; the other columns may legitimately be empty
+REQUIRED_FIELDS = ("SubCode", "Day", "StartTime", "EndTime")
+MAX_REPORTED_ROWS = 10  # Invalid rows listed in the error message
+
+TimingKey = Tuple[str, ...]
+
+# --- Functions ---
+
+def timing_key(row: Dict[str, Any]) -> TimingKey:
+    """Column values of a Timings row (CSV or DB) as a hashable key."""
+    return tuple((row.get(field) or "") for field in CSV_FIELDNAMES)
+
+
+def target_rows_from(csv_rows: List[Dict[str, str]], source: str) -> List[Dict[str, str]]:
+    """
+    Scraped CSV rows (read or in memory) as Timings rows. Rows with an empty optional
+    column (e.g. Class) are kept as "". Any row missing a REQUIRED_FIELDS value raises
+    ValueError instead of being dropped, as a dropped row would be deleted from Timings.
+    """
+    rows: List[Dict[str, str]] = []
+    invalid: List[str] = []
+    for row_number, row in enumerate(csv_rows, start=1):
+        row = {field: (row.get(field) or "").strip() for field in CSV_FIELDNAMES}
+        missing = [field for field in REQUIRED_FIELDS if not row[field]]
+        if missing:
+            invalid.append(f"row {row_number}: missing {', '.join(missing)}")
+            continue
+        row["StartTime"] = normalize_time(row["StartTime"])
+        row["EndTime"] = normalize_time(row["EndTime"])
+        rows.append(row)
+
+    if invalid:
+        listed = "; ".join(invalid[:MAX_REPORTED_ROWS])
+        more = f" (and {len(invalid) - MAX_REPORTED_ROWS} more)" if len(invalid) > MAX_REPORTED_ROWS else ""
+        raise ValueError(f"{len(invalid)} incomplete row(s) in {source}, refusing to sync: {listed}{more}")
+    print(f"Read {len(rows)} rows from {source}.")
+    return rows
+
+
+def load_target_rows(csv_path: Path) -> List[Dict[str, str]]:
+    """Reads the scraped CSV as Timings rows (see target_rows_from; raises ValueError on incomplete rows)."""
+    if not csv_path.is_file():
+        raise FileNotFoundError(f"CSV file not found at {csv_path}")
+    return target_rows_from(read_csv_rows(csv_path), str(csv_path))
+
+
+def fetch_current_timings() -> List[Dict[str, Any]]:
+    """Fetches every Timings row (with its id) using parallel keyset pagination."""
+    print(f"Fetching current '{TIMINGS_TABLE}' rows...")
+    columns = ", ".join(["id", *CSV_FIELDNAMES])
+    rows = fetch_rows_by_id(get_shared_client(), TIMINGS_TABLE, columns)
+    print(f"Found {len(rows)} rows in '{TIMINGS_TABLE}'.")
+    return rows
+
+
+def compute_timings_diff(
+    current_rows: List[Dict[str, Any]], target_rows: List[Dict[str, str]]
+) -> Tuple[List[int], List[Dict[str, str]]]:
+    """
+    Multiset difference between the table and the CSV.
+    Returns (ids to delete, rows to insert); rows present in both are left alone.
+    """
+    ids_by_key: DefaultDict[TimingKey, List[int]] = defaultdict(list)
+    for row in sorted(current_rows, key=lambda r: r["id"]):
+        ids_by_key[timing_key(row)].append(row["id"])
+
+    target_counts: Counter = Counter(timing_key(row) for row in target_rows)
+
+    delete_ids: List[int] = []
+    for key, ids in ids_by_key.items():
+        surplus = len(ids) - target_counts.get(key, 0)
+        if surplus > 0:
+            delete_ids.extend(ids[-surplus:])  # Keep the oldest ids stable
+
+    insert_rows: List[Dict[str, str]] = []
+    seen: Counter = Counter()
+    for row in target_rows:
+        key = timing_key(row)
+        seen[key] += 1
+        if seen[key] > len(ids_by_key.get(key, ())):
+            insert_rows.append(row)
+
+    return sorted(delete_ids), insert_rows
+
+
+def stage_diff(run_id: str, delete_ids: List[int], insert_rows: List[Dict[str, str]],
+               chunk_size: int) -> None:
+    """Writes the diff into the staging table in chunks of chunk_size rows."""
+    staged: List[Dict[str, Any]] = [
+        {"RunId": run_id, "Op": "delete", "TargetId": timing_id} for timing_id in delete_ids
+    ]
+    staged.extend({"RunId": run_id, "Op": "insert", **row} for row in insert_rows)
+
+    # PostgREST bulk inserts need the same keys on every row
+    for entry in staged:
+        entry.setdefault("TargetId", None)
+        for field in CSV_FIELDNAMES:
+            entry.setdefault(field, None)
+
+    for start in range(0, len(staged), chunk_size):
+        chunk = staged[start:start + chunk_size]
+        get_shared_client().table(STAGING_TABLE).insert(chunk, returning=ReturnMethod.minimal).execute()
+        print(f"  Staged {start + len(chunk)}/{len(staged)} operations")
+
+
+def apply_staged(run_id: str, expected_deletes: int, expected_inserts: int) -> Dict[str, Any]:
+    """Applies a staged run to Timings in one transaction. Returns the row counts."""
+    response = get_shared_client().rpc(APPLY_FUNCTION, {
+        "p_run_id": run_id,
+        "p_expected_deletes": expected_deletes,
+        "p_expected_inserts": expected_inserts,
+    }).execute()
+    return response.data or {}
+
+
+def discard_staged(run_id: str) -> None:
+    """Removes a run's leftover staging rows after a failure (best effort)."""
+    try:
+        get_shared_client().table(STAGING_TABLE).delete().eq("RunId", run_id).execute()
+    except Exception as cleanup_err:
+        print(f"Warning: could not clear staged rows for run {run_id}: {cleanup_err}",
+              file=sys.stderr)
+
+
+def sync_timings(csv_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False) -> bool:
+    """Brings Timings in line with the CSV. Returns True on success."""
+    return sync_target_rows(load_target_rows(csv_path), chunk_size, dry_run)
+
+
+def sync_target_rows(target_rows: List[Dict[str, str]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     dry_run: bool = False) -> bool:
+    """Brings Timings in line with target_rows (see target_rows_from). Returns True on success."""
+    current_rows = fetch_current_timings()
+    delete_ids, insert_rows = compute_timings_diff(current_rows, target_rows)
+    unchanged = len(current_rows) - len(delete_ids)
+    print(f"Diff: {len(insert_rows)} to insert, {len(delete_ids)} to delete, {unchanged} unchanged.")
+
+    if not delete_ids and not insert_rows:
+        print(f"'{TIMINGS_TABLE}' already matches the CSV. Nothing to do.")
+        return True
+    if dry_run:
+        print("Dry run: no changes written.")
+        return True
+
+    run_id = f"{datetime.datetime.now(datetime.timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+    try:
+        stage_diff(run_id, delete_ids, insert_rows, chunk_size)
+        result = apply_staged(run_id, len(delete_ids), len(insert_rows))
+    except Exception:
+        discard_staged(run_id)
+        raise
+    print(f"Applied run {run_id}: {result.get('deleted', 0)} deleted, "
+          f"{result.get('inserted', 0)} inserted.")
+    return True
+
+
+# --- Main Execution ---
+def main():
+    """Parse args and run the sync."""
+    parser = argparse.ArgumentParser(description="Sync the scraped timetable CSV into the Timings table.")
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV_PATH,
+                        help=f"Scraped timetable CSV (default: {DEFAULT_CSV_PATH})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows per staging insert (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="Compute and print the diff without writing")
+    args = parser.parse_args()
+
+    print("Starting Timings sync...")
+    try:
+        success = sync_timings(args.csv, max(1, args.chunk_size), args.dry_run)
+    except ValueError as value_err:
+        # Missing configuration, or a CSV with incomplete rows
+        print(f"Error: {value_err}", file=sys.stderr)
+        success = False
+    except (APIError, RequestError, HTTPStatusError) as db_err:
+        print(f"Database error during sync: {type(db_err).__name__} - {db_err}", file=sys.stderr)
+        success = False
+    except FileNotFoundError as fnf_err:
+        print(f"Error: {fnf_err}", file=sys.stderr)
+        success = False
+    except Exception as e:
+        print(f"Unexpected error during sync: {e}", file=sys.stderr)
+        traceback.print_exc()
+        success = False
+    finally:
+        close_shared_client()
+
+    if success:
+        print("Timings sync finished successfully.")
+        sys.exit(0)
+    print("Timings sync finished with errors.", file=sys.stderr)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
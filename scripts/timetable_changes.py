@@ -0,0 +1,185 @@
+# \scripts\timetable_changes.py
+"""
+Row-level change tracking for the scraped timetable CSV.
+
+Rows are written in a canonical sort order, and each run is diffed against the
+previous CSV through a keyed, hashed row index:
+  * key  = (SubCode, Class, Day, Teacher, Room); a section can meet several times a
+           day in the same room, so a key maps to a list of rows
+  * hash = digest of all column values
+Same key + same hash is unchanged, same key + different hash is modified (a time
+change), anything else is added/removed. The scraper logs the counts and uses them
+to tell a rewritten timetable from an unchanged one.
+"""
+
+import csv
+import datetime
+import hashlib
+import io
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import List, Dict, Tuple, Any, DefaultDict, Union
+
+# --- Constants ---
+CSV_FIELDNAMES = ["SubCode", "Class", "Day", "StartTime", "EndTime", "Room", "Teacher"]
+KEY_FIELDS = ("SubCode", "Class", "Day", "Teacher", "Room")
+DAY_ORDER = {
+    day: index
+    for index, day in enumerate(
+        ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    )
+}
+CHANGESET_VERSION = 1
+
+Row = Dict[str, str]
+
+
+def time_to_minutes(value: str) -> int:
+    """'8:30' / '08:30' -> 510. Unparseable values sort last."""
+    try:
+        hours, minutes = value.split(":", 1)
+        return int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return 24 * 60
+
+
+def normalize_time(value: str) -> str:
+    """'8:30' -> '08:30'. Timings stores zero-padded times so string comparisons work."""
+    hours, sep, minutes = value.strip().partition(":")
+    if not sep or not hours.isdigit():
+        return value.strip()
+    return f"{int(hours):02d}:{minutes}"
+
+
+def canonical_sort_key(row: Row) -> Tuple:
+    """Sort by subject, class, weekday order, start/end time, then room and teacher."""
+    return (
+        row["SubCode"],
+        row["Class"],
+        DAY_ORDER.get(row["Day"], len(DAY_ORDER)),
+        time_to_minutes(row["StartTime"]),
+        time_to_minutes(row["EndTime"]),
+        row["Room"],
+        row["Teacher"],
+        row["StartTime"],  # Tie-breakers keep the order total for odd time strings
+        row["EndTime"],
+        row["Day"],
+    )
+
+
+def sort_rows(rows: List[Row]) -> List[Row]:
+    """Returns the rows in canonical order."""
+    return sorted(rows, key=canonical_sort_key)
+
+
+def row_hash(row: Row) -> str:
+    """Short content hash over all columns of a row."""
+    joined = "\x1f".join(row.get(field, "") for field in CSV_FIELDNAMES)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def build_row_index(rows: List[Row]) -> Dict[Tuple, List[Tuple[str, Row]]]:
+    """Index rows as {(key fields...): [(row hash, row), ...]} in canonical order."""
+    index: DefaultDict[Tuple, List[Tuple[str, Row]]] = defaultdict(list)
+    for row in sort_rows(rows):
+        key = tuple(row.get(field, "") for field in KEY_FIELDS)
+        index[key].append((row_hash(row), row))
+    return index
+
+
+def diff_rows(previous_rows: List[Row], current_rows: List[Row]) -> Dict[str, Any]:
+    """
+    Computes the changeset between two row lists. Within each key, rows with equal
+    hashes are matched first (unchanged); leftovers are paired in canonical order as
+    modified, and any surplus is added or removed.
+    """
+    previous_index = build_row_index(previous_rows)
+    current_index = build_row_index(current_rows)
+
+    added: List[Row] = []
+    removed: List[Row] = []
+    modified: List[Dict[str, Row]] = []
+    unchanged = 0
+    for key in sorted(previous_index.keys() | current_index.keys()):
+        previous_entries = previous_index.get(key, [])
+        current_entries = current_index.get(key, [])
+        previous_hashes = Counter(entry_hash for entry_hash, _ in previous_entries)
+        current_hashes = Counter(entry_hash for entry_hash, _ in current_entries)
+        common = previous_hashes & current_hashes
+        unchanged += sum(common.values())
+
+        previous_left = _without_hashes(previous_entries, common)
+        current_left = _without_hashes(current_entries, common)
+        for before, after in zip(previous_left, current_left):
+            modified.append({"before": before, "after": after})
+        removed.extend(previous_left[len(current_left):])
+        added.extend(current_left[len(previous_left):])
+
+    return {
+        "version": CHANGESET_VERSION,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "previous_rows": len(previous_rows),
+        "current_rows": len(current_rows),
+        "counts": {
+            "added": len(added),
+            "removed": len(removed),
+            "modified": len(modified),
+            "unchanged": unchanged,
+        },
+        "added": added,
+        "removed": removed,
+        "modified": modified,
+    }
+
+
+def _without_hashes(entries: List[Tuple[str, Row]], matched: Counter) -> List[Row]:
+    """Rows of entries left over after removing `matched` occurrences of each hash."""
+    remaining = Counter(matched)
+    leftover: List[Row] = []
+    for entry_hash, row in entries:
+        if remaining[entry_hash] > 0:
+            remaining[entry_hash] -= 1
+        else:
+            leftover.append(row)
+    return leftover
+
+
+def has_changes(changeset: Dict[str, Any]) -> bool:
+    """True if the changeset adds, removes or modifies any row."""
+    counts = changeset["counts"]
+    return bool(counts["added"] or counts["removed"] or counts["modified"])
+
+
+def read_csv_rows(csv_path: Path) -> List[Row]:
+    """Reads a timetable CSV into row dicts. A missing file yields no rows."""
+    if not csv_path.is_file():
+        return []
+    with csv_path.open("r", newline="", encoding="utf-8") as csv_file:
+        return [
+            {field: row.get(field) or "" for field in CSV_FIELDNAMES}
+            for row in csv.DictReader(csv_file)
+        ]
+
+
+def render_csv(rows: List[Row]) -> str:
+    """
+    Renders rows (already in canonical order) as CSV text with the csv module's
+    default CRLF line endings, like the committed classes.csv.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_if_changed(output_path: Path, content: Union[str, bytes]) -> bool:
+    """Writes content atomically unless the file already holds exactly it. Returns True if written."""
+    encoded = content if isinstance(content, bytes) else content.encode("utf-8")
+    if output_path.is_file() and output_path.read_bytes() == encoded:
+        return False
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    tmp_path.write_bytes(encoded)
+    tmp_path.replace(output_path)
+    return True
@@ -0,0 +1,108 @@
+# \scripts\timetable_extract.py
+# pylint: disable=broad-except
+"""
+Extraction of the `timetableData = [...]` array embedded in the timetable viewer page.
+
+Two strategies are provided:
+  * extract_timetable_json_fast: scans the raw HTML once for the assignment, finds the
+    end of the array with a bracket/string-aware scanner and decodes only that slice.
+  * extract_timetable_json_soup: the original BeautifulSoup + DOTALL regex approach,
+    kept as the fallback when the fast path fails.
+"""
+
+import json
+import re
+import traceback
+from typing import Optional, List, Dict
+
+# Third-party imports
+from bs4 import BeautifulSoup, Tag
+
+# --- Patterns ---
+# Start of the assignment, up to and including the opening bracket
+ASSIGNMENT_RE = re.compile(r"timetableData\s*=\s*\[")
+# Everything up to the next bracket outside a string; double-quoted strings (with
+# escapes) are consumed whole, so brackets inside them are never seen by the scanner
+_SKIP_TO_BRACKET_RE = re.compile(
+    r'[^"\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]]*)*', re.DOTALL
+)
+# Regex used by the BeautifulSoup fallback (unchanged from the original scraper)
+SOUP_SCRIPT_RE = re.compile(r"timetableData\s*=\s*(\[.*\])\s*;", re.DOTALL | re.MULTILINE)
+
+
+def find_json_array_end(text: str, open_index: int) -> int:
+    """
+    Returns the index just past the `]` matching the `[` at open_index, or -1 if the
+    array is unterminated. Brackets inside double-quoted strings are ignored.
+    The regex jumps from bracket to bracket, so Python only loops once per bracket.
+    """
+    depth = 0
+    pos = open_index
+    text_len = len(text)
+
+    while pos < text_len:
+        char = text[pos]
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        else:
+            return -1  # Stopped on an unterminated string
+        pos = _SKIP_TO_BRACKET_RE.match(text, pos + 1).end()
+
+    return -1
+
+
+def extract_timetable_json_fast(html_content: str) -> Optional[List[Dict]]:
+    """
+    DOM-free extraction of the timetableData array.
+    Returns the decoded list, or None if the assignment is missing or not valid JSON.
+    """
+    for match in ASSIGNMENT_RE.finditer(html_content):
+        open_index = match.end() - 1
+        end_index = find_json_array_end(html_content, open_index)
+        if end_index == -1:
+            continue
+        try:
+            timetable_data = json.loads(html_content[open_index:end_index])
+        except json.JSONDecodeError:
+            continue
+        if isinstance(timetable_data, list):
+            return timetable_data
+    return None
+
+
+def extract_timetable_json_soup(html_content: str) -> Optional[List[Dict]]:
+    """
+    Extracts timetableData by parsing the whole page with BeautifulSoup and running a
+    DOTALL regex over the script containing it. Slow, but tolerant of odd markup.
+    """
+    try:
+        soup = BeautifulSoup(html_content, "html.parser")
+        scripts: List[Tag] = soup.find_all("script")
+
+        for script in scripts:
+            if script.string and "timetableData" in script.string:
+                match = SOUP_SCRIPT_RE.search(script.string)
+                if match:
+                    json_str = match.group(1)
+                    try:
+                        timetable_data: List[Dict] = json.loads(json_str)
+                        return timetable_data
+                    except json.JSONDecodeError as json_err:
+                        print(f"Error decoding timetableData JSON: {json_err}")
+                        return None
+                else:
+                    print(
+                        "  Found script with 'timetableData' but regex "
+                        "didn't match expected structure."
+                    )
+
+        print("Error: Could not find 'timetableData' variable in any script tag.")
+        return None
+    except Exception as exc:
+        print(f"Error parsing HTML for timetable data: {exc}")
+        traceback.print_exc()
+        return None
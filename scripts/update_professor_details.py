@@ -3,41 +3,74 @@
 """
 Script to update professor contact details in the database.
 Usage: python update_professor_details.py <name> [--email <email>] [--phone <phone>]
+       python update_professor_details.py --batch updates.csv|updates.jsonl [--report report.json] [--dry-run]
+
+Names are resolved with a NameIndex (see name_index.py), so "Dr. John Smith" finds
+"John Smith"; unmatched names get "did you mean" suggestions. A single update indexes
+only the rows sharing a word with the name (one query).
+Batch mode reads many (name, email, phone) updates, resolves every name against one
+roster read, and writes all changes in one bulk upsert.
 """
 
+import csv
+import json
+import re
 import sys
 import argparse
 import traceback
-from typing import Optional
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, List, Dict, Any, DefaultDict, Tuple
 
 # Third-party imports
 from postgrest.exceptions import APIError
 from httpx import RequestError, HTTPStatusError
 
 # Local imports
-from db_connection import get_supabase_client
+from db_connection import close_shared_client, get_shared_client
+from keyset_pagination import fetch_rows_sequential
+from name_index import NameIndex, normalize_name
 
 # --- Configuration ---
 TEACHER_TABLE = "Teacher"
-
-# --- Supabase Client Initialization ---
-try:
-    supabase = get_supabase_client()
-except ValueError as config_err:
-    print(f"Configuration Error: {config_err}", file=sys.stderr)
-    sys.exit("Exiting due to missing Supabase configuration.")
-except Exception as init_err:
-    print(f"Unexpected error initializing Supabase client: {init_err}", file=sys.stderr)
-    sys.exit("Exiting due to Supabase client initialization failure.")
+NOT_PROVIDED = "[Not provided]"
+# Name words usable in an ilike pattern (no PostgREST / LIKE metacharacters)
+_NAME_WORD_RE = re.compile(r"[\w'-]+")
 
 # --- Functions ---
 
+def build_name_index(roster: List[Dict[str, Any]]) -> NameIndex:
+    """NameIndex of the roster; each entry's payload is the teacher row."""
+    return NameIndex((teacher["Name"], teacher) for teacher in roster if teacher.get("Name"))
+
+
+def fetch_name_candidates(name: str) -> List[Dict[str, Any]]:
+    """
+    Teacher rows sharing at least one word with name, in one query. Every row whose
+    normalised name equals name's is among them, as are most close spellings.
+    """
+    words = [word for word in normalize_name(name).split() if _NAME_WORD_RE.fullmatch(word)]
+    # Single letters (initials) would match most of the roster
+    words = [word for word in words if len(word) > 1] or words
+    if not words:
+        return []
+    # '*' is PostgREST's LIKE wildcard; apostrophes may be curly in the table
+    patterns = [f'Name.ilike."*{word.replace(chr(39), "*")}*"' for word in dict.fromkeys(words)]
+    response = get_shared_client().table(TEACHER_TABLE).select("id, Name").or_(",".join(patterns)).execute()
+    return response.data or []
+
+
+def suggest_names(name_index: NameIndex, name: str) -> str:
+    """Comma-separated closest roster names for an unmatched name ("" if none)."""
+    return ", ".join(match_name for _score, match_name, _teacher in name_index.approximate(name, limit=3))
+
+
 def update_professor_details(name: str, email: Optional[str] = None, phone: Optional[str] = None) -> bool:
     """
     Updates professor contact details in the database.
 
     Args:
-        name: Professor's full name (case-insensitive search)
+        name: Professor's full name (normalised match, see name_index.normalize_name)
         email: Email address to update (optional)
         phone: Phone number to update (optional)
 
@@ -72,27 +105,29 @@ def update_professor_details(name: str, email: Optional[str] = None, phone: Opti
         print(f"Attempting to update professor: {name}")
         print(f"Update data: {update_data}")
 
-        # First, check if professor exists (case-insensitive)
-        search_response = supabase.table(TEACHER_TABLE).select("*").ilike("Name", name).execute()
+        # First, check if professor exists (normalised name match among the candidates)
+        name_index = build_name_index(fetch_name_candidates(name))
+        matches = name_index.exact(name)
 
-        if not search_response.data:
+        if not matches:
             print(f"Error: Professor '{name}' not found in database.", file=sys.stderr)
+            suggestions = suggest_names(name_index, name)
+            if suggestions:
+                print(f"Did you mean: {suggestions}?", file=sys.stderr)
             return False
 
-        if len(search_response.data) > 1:
-            print(f"Warning: Multiple professors found with similar names to '{name}':")
-            for prof in search_response.data:
-                print(f"  - {prof.get('Name', 'Unknown')}")
-            print("Using the first match for update.")
-
-        # Get the exact name from database for precise update
-        exact_professor = search_response.data[0]
-        exact_name = exact_professor.get("Name")
+        if len(matches) > 1:
+            print(f"Error: Multiple professors match '{name}':", file=sys.stderr)
+            for match_name, _teacher in matches:
+                print(f"  - {match_name}", file=sys.stderr)
+            print("Refusing to guess; update the intended row directly.", file=sys.stderr)
+            return False
 
+        exact_name, exact_professor = matches[0]
         print(f"Found professor in database: {exact_name}")
 
-        # Perform the update using exact name match
-        update_response = supabase.table(TEACHER_TABLE).update(update_data).eq("Name", exact_name).execute()
+        # Perform the update by id, so rows with near-identical names are never touched
+        update_response = get_shared_client().table(TEACHER_TABLE).update(update_data).eq("id", exact_professor["id"]).execute()
 
         if update_response.data and len(update_response.data) > 0:
             updated_professor = update_response.data[0]
@@ -119,6 +154,131 @@ def update_professor_details(name: str, email: Optional[str] = None, phone: Opti
         traceback.print_exc()
         return False
 
+def clean_contact(value: Optional[str]) -> Optional[str]:
+    """Stripped contact value, or None for empty / "[Not provided]" values."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value or value == NOT_PROVIDED:
+        return None
+    return value
+
+
+def read_batch_file(batch_path: Path) -> List[Dict[str, Optional[str]]]:
+    """
+    Reads updates from a CSV (header with name/email/phone columns, any case) or a JSONL
+    file (one {"name", "email", "phone"} object per line). Raises ValueError, naming the
+    line, for JSONL lines that are not JSON objects.
+    """
+    def normalise(record: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        lowered = {str(key).strip().lower(): value for key, value in record.items()}
+        return {field: lowered.get(field) for field in ("name", "email", "phone")}
+
+    with batch_path.open("r", newline="", encoding="utf-8") as batch_file:
+        if batch_path.suffix.lower() in (".jsonl", ".ndjson"):
+            updates = []
+            for line_number, line in enumerate(batch_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as json_err:
+                    raise ValueError(f"{batch_path}:{line_number}: invalid JSON ({json_err.msg})") from json_err
+                if not isinstance(record, dict):
+                    raise ValueError(f"{batch_path}:{line_number}: expected a JSON object, "
+                                     f"got {type(record).__name__}")
+                updates.append(normalise(record))
+            return updates
+        return [normalise(row) for row in csv.DictReader(batch_file)]
+
+
+def plan_batch_updates(updates: List[Dict[str, Optional[str]]],
+                       name_index: NameIndex
+                       ) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """
+    Resolves each update against the name index. Returns (report rows, changed teacher
+    rows keyed by id). Ambiguous names are reported, never guessed.
+    """
+    report: List[Dict[str, Any]] = []
+    changed: Dict[int, Dict[str, Any]] = {}
+    for line_number, update in enumerate(updates, start=1):
+        name = (update.get("name") or "").strip()
+        email, phone = clean_contact(update.get("email")), clean_contact(update.get("phone"))
+        entry: Dict[str, Any] = {"row": line_number, "name": name}
+
+        if not name:
+            entry.update(status="invalid", detail="missing name")
+        elif not email and not phone:
+            entry.update(status="invalid", detail="no email or phone given")
+        else:
+            matches = [teacher for _match_name, teacher in name_index.exact(name)]
+            if not matches:
+                suggestions = suggest_names(name_index, name)
+                entry.update(status="not_found")
+                if suggestions:
+                    entry["detail"] = f"did you mean: {suggestions}"
+            elif len(matches) > 1:
+                entry.update(status="ambiguous", detail=", ".join(match["Name"] for match in matches))
+            else:
+                teacher = changed.get(matches[0]["id"], dict(matches[0]))
+                fields = {"Email": email, "Phone": phone}
+                fields = {column: value for column, value in fields.items() if value}
+                entry["matched_name"] = teacher["Name"]
+                if all(teacher.get(column) == value for column, value in fields.items()):
+                    entry.update(status="unchanged")
+                else:
+                    teacher.update(fields)
+                    changed[teacher["id"]] = teacher
+                    entry.update(status="updated", fields=fields)
+        report.append(entry)
+    return report, changed
+
+
+def run_batch_update(batch_path: Path, report_path: Optional[Path] = None, dry_run: bool = False) -> bool:
+    """
+    Applies a file of contact updates: one roster read (a single request below 1000
+    professors), one bulk upsert.
+    Returns True if every row was applied or already up to date.
+    """
+    try:
+        updates = read_batch_file(batch_path)
+    except (OSError, ValueError, csv.Error) as batch_err:
+        print(f"Error reading batch file: {batch_err}", file=sys.stderr)
+        return False
+    print(f"Read {len(updates)} updates from {batch_path}")
+
+    roster = fetch_rows_sequential(get_shared_client(), TEACHER_TABLE, "id, Name, Email, Phone")
+    print(f"Indexed {len(roster)} professors from '{TEACHER_TABLE}'")
+    report, changed = plan_batch_updates(updates, build_name_index(roster))
+
+    if changed and not dry_run:
+        try:
+            get_shared_client().table(TEACHER_TABLE).upsert(list(changed.values()), on_conflict="id").execute()
+            print(f"Applied {len(changed)} professor updates in one request.")
+        except (APIError, RequestError, HTTPStatusError) as db_err:
+            print(f"Database error applying batch: {type(db_err).__name__} - {db_err}", file=sys.stderr)
+            for entry in report:
+                if entry["status"] == "updated":
+                    entry.update(status="failed", detail=str(db_err))
+    elif dry_run:
+        print("Dry run: no changes written.")
+
+    counts: DefaultDict[str, int] = defaultdict(int)
+    for entry in report:
+        counts[entry["status"]] += 1
+        if entry["status"] not in ("updated", "unchanged"):
+            detail = f" ({entry['detail']})" if entry.get("detail") else ""
+            print(f"  row {entry['row']}: {entry['name'] or '<empty>'} -> {entry['status']}{detail}")
+    print("Summary: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+
+    if report_path:
+        with report_path.open("w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Per-row report written to {report_path}")
+
+    return all(entry["status"] in ("updated", "unchanged") for entry in report)
+
+
 def main():
     """Main function to parse arguments and update professor details."""
     parser = argparse.ArgumentParser(
@@ -129,23 +289,35 @@ Examples:
   python update_professor_details.py "John Smith" --email "john.smith@uowdubai.ac.ae"
   python update_professor_details.py "Jane Doe" --phone "1234"
   python update_professor_details.py "Bob Wilson" --email "bob@uowdubai.ac.ae" --phone "+97155555555"
+  python update_professor_details.py --batch updates.csv --report report.json
         """
     )
 
-    parser.add_argument("name", help="Professor's full name")
+    parser.add_argument("name", nargs="?", help="Professor's full name")
     parser.add_argument("--email", help="Email address to update")
     parser.add_argument("--phone", help="Phone number to update")
+    parser.add_argument("--batch", type=Path, help="CSV or JSONL file of name/email/phone updates")
+    parser.add_argument("--report", type=Path, help="Write the per-row batch result to this JSON file")
+    parser.add_argument("--dry-run", action="store_true", help="Batch mode: resolve and report without writing")
 
     args = parser.parse_args()
 
+    if args.batch and (args.name or args.email or args.phone):
+        parser.error("--batch cannot be combined with a name, --email or --phone.")
+    if not args.batch and not args.name:
+        parser.error("Provide a professor name or --batch FILE.")
+
     # Validate that at least one contact detail is provided
-    if not args.email and not args.phone:
+    if not args.batch and not args.email and not args.phone:
         print("Error: At least one contact detail (--email or --phone) must be provided.", file=sys.stderr)
         parser.print_help()
         sys.exit(1)
 
     try:
-        success = update_professor_details(args.name, args.email, args.phone)
+        if args.batch:
+            success = run_batch_update(args.batch, args.report, args.dry_run)
+        else:
+            success = update_professor_details(args.name, args.email, args.phone)
 
         if success:
             print("Professor details updated successfully.")
@@ -162,12 +334,8 @@ Examples:
         traceback.print_exc()
         sys.exit(1)
     finally:
-        # Attempt to disconnect (if supported by the client)
-        try:
-            supabase.rpc("disconnect_db", {})
-        except:
-            pass  # Ignore disconnect errors
-        print("Database connection closed.")
+        # Close pooled connections (no-op if the run never connected)
+        close_shared_client()
 
 if __name__ == "__main__":
     main()
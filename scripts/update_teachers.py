@@ -2,16 +2,21 @@
 # Renamed and repurposed from upload_timetable.py
 import csv
 import sys
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Iterable
 
 # Third-party imports
 from postgrest.exceptions import APIError
 from httpx import RequestError, HTTPStatusError
 
 # Local imports
-from db_connection import get_supabase_client
+from db_connection import close_shared_client, get_shared_client
+from fetch_policy import BackoffPolicy
+from keyset_pagination import iter_rows_by_id
+from name_index import DEFAULT_CLUSTER_SIMILARITY, NameIndex, normalize_name
 
 # --- Configuration ---
 SCRIPT_DIR = Path(__file__).parent
@@ -19,33 +24,32 @@ DEFAULT_CSV_PATH = SCRIPT_DIR.parent / "public" / "classes.csv"
 TEACHER_TABLE = "Teacher"
 # Define placeholder/common names to ignore from the CSV
 PLACEHOLDER_TEACHER_NAMES_CSV = {'Unknown', 'TBA', 'Staff', 'Instructor', 'Adjunct', 'TBD'} # Case-sensitive match from CSV
-
-# --- Supabase Client Initialization ---
-try:
-    supabase = get_supabase_client()
-except ValueError as config_err:
-    print(f"Configuration Error: {config_err}", file=sys.stderr)
-    sys.exit("Exiting due to missing Supabase configuration.")
-except Exception as init_err:
-    print(f"Unexpected error initializing Supabase client: {init_err}", file=sys.stderr)
-    sys.exit("Exiting due to Supabase client initialization failure.")
+# Bulk insert via the upsert_teachers() SQL function (scripts/sql/upsert_teachers.sql)
+UPSERT_FUNCTION = "upsert_teachers"
+UPSERT_CHUNK_SIZE = 200
+UPSERT_WORKERS = 4
+UPSERT_MAX_ATTEMPTS = 4
+UPSERT_BACKOFF = BackoffPolicy(base=1.0, cap=15.0)
 
 # --- Functions ---
 
-def fetch_existing_teacher_names() -> Set[str]:
-    """Fetches all existing teacher names from the Teacher table."""
+def fetch_existing_teacher_names() -> NameIndex:
+    """Fetches all existing teacher names, page by page, into a NameIndex."""
     print(f"Fetching existing teacher names from '{TEACHER_TABLE}' table...")
-    existing_names: Set[str] = set()
+    existing = NameIndex()
     try:
-        response = supabase.table(TEACHER_TABLE).select("Name").execute()
-        if response.data:
-            for teacher in response.data:
+        # Keyset pages on id: no silent truncation at the PostgREST row cap
+        for rows in iter_rows_by_id(get_shared_client(), TEACHER_TABLE, "id, Name"):
+            for teacher in rows:
                 if teacher.get("Name"):
-                    existing_names.add(teacher["Name"])
-            print(f"Found {len(existing_names)} existing teachers in the database.")
+                    existing.add(teacher["Name"], teacher["id"])
+        if len(existing):
+            print(f"Found {len(existing)} existing teachers in the database.")
         else:
             print("No existing teachers found in the database.")
-        return existing_names
+        return existing
+    except ValueError as config_err:
+        print(f"Configuration Error: {config_err}", file=sys.stderr)
     except (APIError, RequestError, HTTPStatusError) as db_err:
         print(f"Error fetching existing teachers: {type(db_err).__name__} - {db_err}", file=sys.stderr)
     except Exception as e:
@@ -55,13 +59,9 @@ def fetch_existing_teacher_names() -> Set[str]:
     raise RuntimeError("Failed to fetch existing teacher names.")
 
 
-def find_new_teachers_from_csv(csv_path: Path, existing_names: Set[str]) -> List[Dict[str, Any]]:
-    """Reads CSV, finds unique teacher names not in existing_names, and prepares them for insertion."""
+def find_new_teachers_from_csv(csv_path: Path, existing: NameIndex) -> List[Dict[str, Any]]:
+    """Reads CSV, finds unique teacher names with no normalised match in `existing`, and prepares them for insertion."""
     print(f"Reading teachers from CSV: {csv_path}...")
-    unique_csv_teachers: Set[str] = set()
-    new_teachers_to_insert: List[Dict[str, Any]] = []
-    total_rows_in_csv = 0
-
     try:
         if not csv_path.is_file():
             raise FileNotFoundError(f"CSV file not found at {csv_path}")
@@ -70,32 +70,7 @@ def find_new_teachers_from_csv(csv_path: Path, existing_names: Set[str]) -> List
             reader = csv.DictReader(f)
             if "Teacher" not in (reader.fieldnames or []):
                 raise ValueError("CSV file must contain a 'Teacher' column.")
-
-            for i, row in enumerate(reader):
-                total_rows_in_csv += 1
-                teacher_name = row.get("Teacher")
-                # Basic validation and ignore placeholders
-                if teacher_name and teacher_name.strip() and teacher_name not in PLACEHOLDER_TEACHER_NAMES_CSV:
-                    unique_csv_teachers.add(teacher_name.strip()) # Add normalized name
-                # else:
-                #     print(f"Debug: Skipping row {i+1} due to missing or placeholder teacher: {teacher_name}")
-
-
-        print(f"Found {len(unique_csv_teachers)} unique, non-placeholder teacher names in CSV (out of {total_rows_in_csv} rows).")
-
-        # Determine which names are new
-        new_names = unique_csv_teachers - existing_names
-        print(f"Found {len(new_names)} new teachers to add.")
-
-        # Prepare data for insertion (adjust defaults if needed)
-        for name in new_names:
-            new_teachers_to_insert.append({
-                "Name": name,
-                "Email": "", # Use empty string ""
-                "Phone": ""  # Use empty string ""
-        })
-
-        return new_teachers_to_insert
+            return find_new_teachers(reader, existing)
 
     except FileNotFoundError as fnf_err:
         print(f"Error: {fnf_err}", file=sys.stderr)
@@ -107,31 +82,99 @@ def find_new_teachers_from_csv(csv_path: Path, existing_names: Set[str]) -> List
 
     return [] # Return empty list on failure
 
+
+def find_new_teachers(rows: Iterable[Dict[str, Any]], existing: NameIndex) -> List[Dict[str, Any]]:
+    """Finds unique Teacher values of timetable rows with no normalised match in `existing`, prepared for insertion."""
+    # Normalised key -> first spelling seen in the rows
+    unique_csv_teachers: Dict[str, str] = {}
+    new_teachers_to_insert: List[Dict[str, Any]] = []
+    total_rows_in_csv = 0
+
+    for row in rows:
+        total_rows_in_csv += 1
+        teacher_name = row.get("Teacher")
+        # Basic validation and ignore placeholders
+        if teacher_name and teacher_name.strip() and teacher_name not in PLACEHOLDER_TEACHER_NAMES_CSV:
+            unique_csv_teachers.setdefault(normalize_name(teacher_name), " ".join(teacher_name.split()))
+
+    print(f"Found {len(unique_csv_teachers)} unique, non-placeholder teacher names in CSV (out of {total_rows_in_csv} rows).")
+
+    # Determine which names are new
+    new_keys = sorted(key for key in unique_csv_teachers if key and not existing.exact(key))
+    print(f"Found {len(new_keys)} new teachers to add.")
+    # Near-duplicates are still inserted (they may be different people), but flagged
+    for key in new_keys:
+        similar = existing.approximate(key, limit=3, threshold=DEFAULT_CLUSTER_SIMILARITY)
+        if similar:
+            print(f"  Warning: new teacher '{unique_csv_teachers[key]}' resembles existing "
+                  + ", ".join(f"'{name}' ({score:.2f})" for score, name, _ in similar))
+
+    # Prepare data for insertion (adjust defaults if needed)
+    for key in new_keys:
+        new_teachers_to_insert.append({
+            "Name": unique_csv_teachers[key],
+            "Email": "", # Use empty string ""
+            "Phone": ""  # Use empty string ""
+    })
+
+    return new_teachers_to_insert
+
+
+def upsert_teacher_chunk(names: List[str]) -> int:
+    """
+    Inserts one chunk through upsert_teachers(), retrying with backoff. Names that
+    already exist are skipped by the DB, so a retried chunk never creates duplicates.
+    Returns the number of rows actually inserted.
+    """
+    for attempt in range(UPSERT_MAX_ATTEMPTS):
+        try:
+            response = get_shared_client().rpc(UPSERT_FUNCTION, {"p_names": names}).execute()
+            return int(response.data or 0)
+        except (APIError, RequestError, HTTPStatusError) as db_err:
+            if attempt + 1 == UPSERT_MAX_ATTEMPTS:
+                raise
+            wait_time = UPSERT_BACKOFF.delay(attempt)
+            print(f"  Chunk of {len(names)} failed ({type(db_err).__name__}: {db_err}), "
+                  f"retrying in {wait_time:.1f}s...", file=sys.stderr)
+            time.sleep(wait_time)
+    return 0
+
+
 def insert_new_teachers(new_teachers: List[Dict[str, Any]]) -> bool:
-    """Inserts the list of new teachers into the Teacher table."""
+    """Inserts the new teachers in concurrent, idempotent chunks. Returns True if every chunk succeeded."""
     if not new_teachers:
         print("No new teachers to insert.")
         return True # Technically successful as there was nothing to do
 
-    print(f"Attempting to insert {len(new_teachers)} new teachers into '{TEACHER_TABLE}'...")
-    # Consider batching if the number of new teachers could be very large
-    try:
-        response = supabase.table(TEACHER_TABLE).insert(new_teachers).execute()
-        # Check response for errors if needed, Supabase client might raise exceptions on failure
-        inserted_count = len(response.data) if hasattr(response, "data") else "Unknown number of"
-        print(f"Successfully inserted {inserted_count} new teachers.")
-        # You might want more robust error checking based on the response structure
-        # if response.error:
-        #    print(f"Error during insertion: {response.error.message}", file=sys.stderr)
-        #    return False
-        return True
-    except (APIError, RequestError, HTTPStatusError) as db_err:
-        print(f"Error inserting new teachers: {type(db_err).__name__} - {db_err}", file=sys.stderr)
-    except Exception as e:
-        print(f"Unexpected error inserting new teachers: {e}", file=sys.stderr)
-        traceback.print_exc()
-
-    return False
+    names = [teacher["Name"] for teacher in new_teachers]
+    chunks = [names[start:start + UPSERT_CHUNK_SIZE] for start in range(0, len(names), UPSERT_CHUNK_SIZE)]
+    print(f"Attempting to insert {len(names)} new teachers into '{TEACHER_TABLE}' "
+          f"in {len(chunks)} chunk(s)...")
+
+    inserted_count = 0
+    failed_chunks = 0
+    with ThreadPoolExecutor(max_workers=min(UPSERT_WORKERS, len(chunks))) as executor:
+        futures = {executor.submit(upsert_teacher_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                inserted_count += future.result()
+            except (APIError, RequestError, HTTPStatusError) as db_err:
+                failed_chunks += 1
+                print(f"Error inserting chunk starting at '{chunk[0]}': {type(db_err).__name__} - {db_err}", file=sys.stderr)
+            except Exception as e:
+                failed_chunks += 1
+                print(f"Unexpected error inserting chunk starting at '{chunk[0]}': {e}", file=sys.stderr)
+                traceback.print_exc()
+
+    skipped = len(names) - inserted_count
+    print(f"Successfully inserted {inserted_count} new teachers"
+          + (f" ({skipped} already present or in failed chunks)." if skipped else "."))
+    if failed_chunks:
+        print(f"{failed_chunks} chunk(s) failed after {UPSERT_MAX_ATTEMPTS} attempts; "
+              "re-running the script is safe.", file=sys.stderr)
+        return False
+    return True
 
 # --- Main Execution ---
 if __name__ == "__main__":
@@ -152,9 +195,8 @@ if __name__ == "__main__":
         print(f"Script failed: {main_err}", file=sys.stderr)
         final_success = False
     finally:
-        # Ensure disconnect happens
-         supabase.rpc("disconnect_db", {}) # Or equivalent disconnect method if available
-         print("Supabase client disconnected (attempted).")
+        # Close pooled connections
+        close_shared_client()
 
 
     if final_success: